@@ -0,0 +1,57 @@
+# SPDX-License-Identifier: MIT
+from typing import List, Set
+from collections import namedtuple
+
+
+class Usage(namedtuple("Usage", ["battery", "test_id", "variant", "count", "unit_bytes", "consumed", "file_size"])):
+    """Data consumption of one test (variant). The unit_bytes is the number of bytes read
+       by one psample (repetition, stream), consumed is the number of bytes read by all of
+       them. Both are None when the consumption cannot be predicted."""
+    __slots__ = ()
+
+    @property
+    def headroom(self):
+        """Returns number of bytes left unused, negative when the file is rewound."""
+        return None if self.consumed is None else self.file_size - self.consumed
+
+    @property
+    def status(self) -> str:
+        """Returns 'ok', 'rewind' when the test reads more data than available,
+           or 'unknown' when the consumption cannot be predicted."""
+        if self.consumed is None:
+            return "unknown"
+        return "ok" if self.consumed <= self.file_size else "rewind"
+
+
+def _format(value) -> str:
+    return "-" if value is None else str(value)
+
+
+def format_columns(header: List[str], rows: List[List[str]], left: Set[int]) -> str:
+    """Formats rows of cells as a text table with aligned columns.
+
+       :param header: names of the columns
+       :param rows: rows of the table, each one as list of cells
+       :param left: indexes of columns aligned to the left, others are aligned to the right
+       :return: the table
+    """
+    widths = [max(len(row[column]) for row in [header] + rows) for column in range(len(header))]
+    lines = []
+    for row in [header] + rows:
+        cells = [cell.ljust(width) if column in left else cell.rjust(width)
+                 for column, (cell, width) in enumerate(zip(row, widths))]
+        lines.append("  ".join(cells).rstrip())
+    return "\n".join(lines)
+
+
+def format_table(usages: List[Usage]) -> str:
+    """Formats the data consumption of the tests as a text table.
+
+       :param usages: data consumption of the tests
+       :return: the table
+    """
+    header = ["battery", "test", "variant", "count", "bytes/unit", "consumed", "headroom", "status"]
+    rows = [[usage.battery, _format(usage.test_id), _format(usage.variant), _format(usage.count),
+             _format(usage.unit_bytes), _format(usage.consumed), _format(usage.headroom), usage.status]
+            for usage in usages]
+    return format_columns(header, rows, {0, 7})
@@ -0,0 +1,80 @@
+# SPDX-License-Identifier: MIT
+from typing import List, Tuple
+from collections import namedtuple
+import accounting
+import breakpoints
+import utilities
+
+# Number of the cheapest increments printed by the advisor
+INCREMENTS = 20
+
+# Next psample (repetition) of the test - count of the test at the current data size
+# and extra bytes needed for one more.
+Advice = namedtuple("Advice", ["step", "count", "extra"])
+
+
+def advise(args, file_size: int) -> List[Advice]:
+    """Returns extra bytes needed for one more psample (repetition) of every test.
+       The time budget is not taken into account, the advice describes the tests
+       limited only by the data size.
+
+       :param args: parsed command line arguments
+       :param file_size: size of the tested file in bytes
+       :return: list of advices sorted by the extra bytes
+    """
+    advices = []
+    for step in breakpoints.all_steps(args):
+        # Rabbit step for the default repetitions is not a test.
+        if step.test_id is None:
+            continue
+        count = step.count(file_size)
+        advices.append(Advice(step, count, step.first_size(count + 1) - file_size))
+    advices.sort(key=lambda advice: advice.extra)
+    return advices
+
+
+def increments(advices: List[Advice]) -> List[Tuple[int, List[Advice]]]:
+    """Accumulates the advices over the increasing extra bytes. The extra bytes which
+       format to the same short size are merged into the largest of them.
+
+       :param advices: advices sorted by the extra bytes, see advise
+       :return: list of tuples (extra bytes, all tests gaining a psample with them)
+    """
+    groups = []
+    for index, advice in enumerate(advices):
+        if len(groups) > 0 and utilities.format_size(groups[-1][0]) == utilities.format_size(advice.extra):
+            groups[-1] = (advice.extra, advices[:index + 1])
+        else:
+            groups.append((advice.extra, advices[:index + 1]))
+    return groups
+
+
+def run(arguments, file_size: int) -> None:
+    """Prints extra bytes needed for the next psample (repetition) of every test,
+       the cheapest increments of the data size with the psamples and tests they improve
+       and the increments which enable the omitted tests.
+
+       :param arguments: parsed command line arguments
+       :param file_size: size of the tested file in bytes
+    """
+    advices = advise(arguments, file_size)
+    rows = [[advice.step.name, str(advice.count), str(advice.extra), str(file_size + advice.extra)]
+            for advice in advices]
+    print(accounting.format_columns(["test", "count", "extra bytes", "next size"], rows, {0}))
+    print()
+
+    for extra, group in increments(advices)[:INCREMENTS]:
+        # A test may gain several psamples within the increment.
+        psamples = sum(advice.step.count(file_size + extra) - advice.count for advice in group)
+        print("+{} ({} bytes): {} more psamples (repetitions), {} tests improved".format(
+            utilities.format_size(extra), extra, psamples, len(group)))
+
+    # Omitted tests may be far behind the cheapest increments, they are listed separately.
+    enabling = increments([advice for advice in advices if advice.count == 0])
+    if len(enabling) > 0:
+        print()
+    enabled = 0
+    for extra, group in enabling[:INCREMENTS]:
+        print("+{} ({} bytes) enables {}, {} tests enabled in total".format(
+            utilities.format_size(extra), extra, ", ".join(advice.step.name for advice in group[enabled:]), len(group)))
+        enabled = len(group)
@@ -0,0 +1,226 @@
+# SPDX-License-Identifier: MIT
+from typing import Iterator, List, Optional, Tuple
+from glob import glob, has_magic
+from multiprocessing import Pool
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from stat import S_ISREG
+from sys import stderr, exit
+from copy import copy
+from io import StringIO
+import os
+import utilities
+import tuning
+import profiling
+
+# Prepared by the worker initializer, so the arguments are not pickled for every input.
+_worker_arguments = None
+
+
+def collect_inputs(source: str) -> List[Tuple[str, Optional[str], Optional[int]]]:
+    """Collects inputs of the batch run. The source may be a directory (all regular
+       files inside it are used), a glob pattern (all regular files matching it are used)
+       or a manifest file. Each line of the manifest holds either a path to a data file
+       or a data size (in the same format as the --size argument). Empty lines and lines
+       starting with '#' are ignored. Sizes of the data files are discovered later, see
+       discover_sizes.
+
+       :param source: directory, glob pattern or path to the manifest file
+       :return: list of tuples (output name, data file, data size), the data file is
+                a path (os.DirEntry for files inside the directory), None for sizes
+                from the manifest, the size is None when it is not known yet
+    """
+    if os.path.isdir(source):
+        # The directory entries are kept, their stat may be cached (e.g. on Windows).
+        entries = sorted((entry for entry in os.scandir(source) if entry.is_file()), key=lambda entry: entry.name)
+        return [(entry.name, entry, None) for entry in entries]
+    elif has_magic(source):
+        # The matches are not stat'ed here, other files than regular ones are dropped by discover_sizes.
+        return [(os.path.basename(path), path, None) for path in sorted(glob(source))]
+    return read_manifest(source)
+
+
+def _status(data_file) -> Optional[os.stat_result]:
+    try:
+        with profiling.stage("stat"):
+            return os.stat(data_file) if isinstance(data_file, str) else data_file.stat()
+    except OSError:
+        return None
+
+
+def _discovered(item: Tuple[str, Optional[str], Optional[int]]) -> Optional[Tuple[str, Optional[str], Optional[int]]]:
+    name, data_file, _ = item
+    status = _status(data_file)
+    if status is not None and not S_ISREG(status.st_mode):
+        return None
+    # The error is reported by process_input, which reads the size again.
+    return name, data_file if isinstance(data_file, str) else data_file.path, \
+        None if status is None else status.st_size
+
+
+def discover_sizes(inputs: List[Tuple[str, Optional[str], Optional[int]]],
+                   threads: int) -> Iterator[Tuple[str, Optional[str], Optional[int]]]:
+    """Yields the inputs with sizes of their data files. The sizes are read by the given
+       number of threads and every input is yielded as soon as its size is known, so the
+       configurations may be computed while the metadata of other files is read, which
+       helps especially on network storage. Inputs with known sizes are yielded first,
+       data files which are not regular files (e.g. directories matching the pattern) are left out.
+
+       :param inputs: inputs of the batch run, see collect_inputs
+       :param threads: number of threads reading the metadata of the files
+       :return: iterator of tuples (output name, path to data file, data size), the size is
+                None when it cannot be read
+    """
+    pending = []
+    for item in inputs:
+        if item[2] is None and item[1] is not None:
+            pending.append(item)
+        else:
+            yield item
+    if threads == 1:
+        yield from filter(None, map(_discovered, pending))
+        return
+    with ThreadPoolExecutor(threads) as executor:
+        for future in as_completed([executor.submit(_discovered, item) for item in pending]):
+            if future.result() is not None:
+                yield future.result()
+
+
+def read_manifest(manifest: str) -> List[Tuple[str, Optional[str], Optional[int]]]:
+    """Reads the manifest file of the batch run, see collect_inputs.
+
+       :param manifest: path to the manifest file
+       :return: list of tuples (output name, path to data file, data size)
+    """
+    inputs = []
+    with open(manifest) as manifest_file:
+        for line in manifest_file:
+            line = line.strip()
+            if line == "" or line.startswith("#"):
+                continue
+            size = utilities.parse_size(line)
+            if size is None:
+                inputs.append((os.path.basename(line), line, None))
+            else:
+                inputs.append((line, None, size))
+    return inputs
+
+
+def _init_worker(arguments) -> None:
+    global _worker_arguments
+    _worker_arguments = arguments
+
+
+def _init_pool_worker(arguments) -> None:
+    _init_worker(arguments)
+    # Forked workers inherit the samples of the parent, they would be reported twice.
+    if arguments.profile is not None:
+        profiling.collect()
+        profiling.enable()
+
+
+def process_input(item: Tuple[str, Optional[str], Optional[int]]):
+    """Creates configuration for one input of the batch run.
+
+       :param item: tuple (output name, path to data file, data size)
+       :return: tuple (output name, error message or None on success, the configuration
+                as NDJSON line when --ndjson is given, None otherwise, samples of the
+                stages when profiling, see profiling.collect)
+    """
+    with profiling.stage("input"):
+        name, error, line = _process_input(item)
+    return name, error, line, profiling.collect()
+
+
+def _process_input(item: Tuple[str, Optional[str], Optional[int]]) -> Tuple[str, Optional[str], Optional[str]]:
+    # Imported here, config_calc imports this module.
+    import config_calc
+
+    name, path, size = item
+    try:
+        if size is None:
+            with profiling.stage("stat"):
+                size = os.stat(path).st_size
+    except OSError as error:
+        return name, str(error), None
+    if size == 0:
+        return name, "The data size is 0.", None
+
+    arguments = _worker_arguments
+    if arguments.tune:
+        arguments = tuning.tuned_arguments(arguments, size)
+    if arguments.ndjson is not None:
+        buffer = StringIO()
+        config_calc.print_configuration(arguments, buffer, size, [("input", name)])
+        return name, None, buffer.getvalue()
+
+    output = os.path.join(arguments.output_dir, name + ".json")
+    try:
+        config_calc.write_configuration(arguments, output, size)
+    except OSError as error:
+        return name, str(error), None
+    return name, None, None
+
+
+def run(arguments) -> None:
+    """Runs the batch mode - creates one configuration file in the output
+       directory for every input given by the --batch argument, or one line
+       of the --ndjson file. The work is spread over --jobs worker processes,
+       sizes of the data files are read by --stat-threads threads meanwhile.
+
+       :param arguments: parsed command line arguments
+    """
+    inputs = collect_inputs(arguments.batch)
+    names = [name for name, _, _ in inputs]
+    if len(set(names)) != len(names):
+        print("The batch contains several inputs with the same name.", file=stderr)
+        exit(-1)
+    if arguments.ndjson is not None:
+        # NDJSON needs one configuration per line.
+        arguments = copy(arguments)
+        arguments.compact = True
+        output = open(arguments.ndjson, "w")
+    else:
+        os.makedirs(arguments.output_dir, exist_ok=True)
+        output = None
+
+    jobs = arguments.jobs if arguments.jobs is not None else os.cpu_count()
+    try:
+        if jobs == 1:
+            _init_worker(arguments)
+            results = map(process_input, discover_sizes(inputs, arguments.stat_threads))
+            failed, processed = report_failures(results, output)
+        else:
+            # Bigger chunks amortize the inter-process communication for small tasks.
+            chunk_size = max(1, len(inputs) // (jobs * 16))
+            with Pool(jobs, initializer=_init_pool_worker, initargs=(arguments,)) as pool:
+                # The sizes are consumed by the task handler thread of the pool, while the workers compute.
+                sized = discover_sizes(inputs, arguments.stat_threads)
+                failed, processed = report_failures(pool.imap_unordered(process_input, sized, chunk_size), output)
+    finally:
+        if output is not None:
+            output.close()
+
+    if failed > 0:
+        print("Configuration was not created for {} of {} inputs.".format(failed, processed), file=stderr)
+        exit(-1)
+
+
+def report_failures(results, output=None) -> int:
+    """Prints errors of the failed inputs, NDJSON lines of the others are written to the output.
+       Samples of the stages recorded by the workers are merged into the profiling counters.
+
+       :param results: iterable of results of process_input
+       :param output: the --ndjson file, None when the configurations are written by the workers
+       :return: tuple (number of failed inputs, number of all inputs)
+    """
+    failed = 0
+    processed = 0
+    for name, error, line, samples in results:
+        processed += 1
+        profiling.merge(samples)
+        if error is not None:
+            print("{}: {}".format(name, error), file=stderr)
+            failed += 1
+        elif output is not None:
+            output.write(line)
+    return failed, processed
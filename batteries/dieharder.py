@@ -1,6 +1,7 @@
 # SPDX-License-Identifier: MIT
-from typing import Optional
-from utilities import concatenate_test_ids, WARN_VARIABLE
+from typing import List, Optional
+from collections import OrderedDict
+from utilities import apply_limit, concatenate_test_ids, get_buffer, Step, TestDescriptor, WARN_VARIABLE
 
 DEFAULT_PSAMPLES = 100
 
@@ -74,11 +75,83 @@ BYTES_PER_PSAMPLE = {0: 153624,
 
 NTUPLES = {200: (1, 12), 201: (2, 5), 202: (2, 5), 203: (0, 32)}
 
+# Estimated CPU time (in seconds) of one psample on a reference node. The values
+# are approximate and meant for planning, they may differ on other machines.
+SECONDS_PER_PSAMPLE = {0: 0.05,
+                       1: 0.1,
+                       2: 0.15,
+                       3: 0.05,
+                       4: 0.03,
+                       5: 0.1,
+                       6: 0.1,
+                       7: 0.1,
+                       8: 0.01,
+                       9: 0.05,
+                       10: 0.15,
+                       11: 0.02,
+                       12: 0.02,
+                       13: 0.08,
+                       14: 0.001,
+                       15: 0.01,
+                       16: 0.1,
+                       17: 0.6,
+                       100: 0.003,
+                       101: 0.005,
+                       102: 0.05,
+                       204: 0.002,
+                       205: 3.0,
+                       206: 1.5,
+                       207: 5.0,
+                       208: 2.0,
+                       209: 1.0,
+                       210: 0.5,
+                       211: 2.0}
+
+# Estimated CPU time (in seconds) per byte of one psample for tests with variants.
+SECONDS_PER_VARIANT_BYTE = {200: 2.5e-8, 201: 2.5e-7, 202: 3e-8, 203: 1e-8}
+
 TEST_IDS = [0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14, 15, 16, 17, 100,
             101, 102, 200, 201, 202, 203, 204, 205, 206, 207, 208, 209, 210, 211]
 
 VARIABLE_SIZE_TESTS = {13, 16, 207, 208}
 
+# Tests marked as bad by Dieharder, omitted by default
+OMITTED_TESTS = {5, 6, 7, 14}
+
+# Default psamples used by Dieharder where they differ from DEFAULT_PSAMPLES.
+TEST_DEFAULT_PSAMPLES = {201: 1000, 204: 1000, 205: 1, 206: 1, 207: 1, 208: 1, 209: 1, 210: 1, 211: 1}
+
+# Bytes used by one psample of the test variants (identified by ntup).
+VARIANT_BYTES_PER_PSAMPLE = {
+    200: lambda ntup: ntup * 800000 + 4,
+    201: lambda ntup: ntup * 40000,
+    202: lambda ntup: ntup * 400000,
+    203: lambda ntup: (ntup + 1) * 4000000,
+}
+
+
+def _descriptor(test_id: int) -> TestDescriptor:
+    ntup_min, ntup_max = NTUPLES.get(test_id, (0, -1))
+    return TestDescriptor(test_id, TEST_NAMES[test_id], BYTES_PER_PSAMPLE.get(test_id),
+                          variable=test_id in VARIABLE_SIZE_TESTS,
+                          omitted=test_id in OMITTED_TESTS,
+                          variants=tuple(range(ntup_min, ntup_max + 1)),
+                          seconds=SECONDS_PER_PSAMPLE.get(test_id),
+                          repetitions=TEST_DEFAULT_PSAMPLES.get(test_id, DEFAULT_PSAMPLES),
+                          # The first 24 bytes are not used by the test 0
+                          offset=24 if test_id == 0 else 0)
+
+
+# Descriptors of all tests (see utilities.TestDescriptor) in the order of TEST_IDS.
+TESTS = OrderedDict((test_id, _descriptor(test_id)) for test_id in TEST_IDS)
+
+# Bytes used by one psample, indexed by (test_id, ntup), ntup is None for tests without variants.
+# Variable tests are missing, their size depends on the buffer.
+UNITS = {(test.test_id, ntup): VARIANT_BYTES_PER_PSAMPLE[test.test_id](ntup)
+         for test in TESTS.values() for ntup in test.variants}
+UNITS.update({(test.test_id, None): test.unit for test in TESTS.values()
+              if len(test.variants) == 0 and not test.variable})
+
 
 def get_bytes_per_psample(args, test_id: int, ntup: Optional[int]) -> int:
     """Returns number of bytes used by one repetition of first-level
@@ -90,25 +163,34 @@ def get_bytes_per_psample(args, test_id: int, ntup: Optional[int]) -> int:
        :param ntup: int identifying the test variant, None if the test has no variants.
        :return: int representing number of bytes needed for one repetition (psample) of chosen test.
     """
-    # tests with variants
-    if test_id == 200 and 1 <= ntup <= 12:
-        return ntup * 800000 + 4
-    elif test_id == 201 and 2 <= ntup <= 5:
-        return ntup * 40000
-    elif test_id == 202 and 2 <= ntup <= 5:
-        return ntup * 400000
-    elif test_id == 203 and 0 <= ntup <= 32:
-        return (ntup + 1) * 4000000
+    # tests with constant sizes (with or without variants)
+    unit = UNITS.get((test_id, ntup))
+    if unit is not None:
+        return unit
     # tests with variable size
-    elif test_id in VARIABLE_SIZE_TESTS:
-        return int(BYTES_PER_PSAMPLE[test_id] * (1 + args.dieharder_buffer))
-    # rest of tests (with no variants and constant sizes)
-    elif test_id in {0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 14, 15, 17,
-                     100, 101, 102, 204, 205, 206, 209, 210, 211} and ntup is None:
-        return BYTES_PER_PSAMPLE[test_id]
+    test = TESTS.get(test_id)
+    if test is not None and test.variable and ntup is None:
+        buffer = get_buffer(args, "dieharder", test_id, args.dieharder_buffer)
+        return int(test.unit * (1 + buffer))
     raise ValueError("Invalid test ID or combination of test ID and ntup")
 
 
+def get_seconds_per_psample(args, test_id: int, ntup: Optional[int]) -> float:
+    """Returns estimated CPU time (in seconds) of one repetition of first-level
+       test (psample). The test is identified by tuple (test_id, ntup),
+       ntup must be None for tests where it is not applicable.
+
+       :param args: parsed command line arguments
+       :param test_id: int identifying the tests
+       :param ntup: int identifying the test variant, None if the test has no variants.
+       :return: estimated CPU time of one psample in seconds
+    """
+    test = TESTS[test_id]
+    if test.seconds is None:
+        return SECONDS_PER_VARIANT_BYTE[test_id] * get_bytes_per_psample(args, test_id, ntup)
+    return test.seconds
+
+
 def calculate_psamples(args, test_id: int, ntup: Optional[int], file_size: int) -> int:
     """Returns number of repetitions (psamples) of the given first-level
        test. The test is identified by tuple (test_id, ntup),
@@ -120,19 +202,17 @@ def calculate_psamples(args, test_id: int, ntup: Optional[int], file_size: int)
        :param file_size: size of the tested file in bytes
        :return: Number of possible repetitions of first-level tests (psample) for given test and file_size.
     """
-    if test_id == 0:
-        psamples = (file_size - 24) // get_bytes_per_psample(args, test_id, ntup)
-    else:
-        psamples = file_size // get_bytes_per_psample(args, test_id, ntup)
+    psamples = (file_size - TESTS[test_id].offset) // get_bytes_per_psample(args, test_id, ntup)
     return psamples + (1 if args.increased else 0)
 
 
-def dieharder(args, file_size: int):
+def dieharder(args, file_size: int, limits=None):
     """Creates and returns battery configuration for Dieharder battery.
        The configuration is returned as dictionary.
 
        :param args:parsed command line arguments
        :param file_size: size of the tested file in bytes
+       :param limits: highest psamples of the tests, see utilities.apply_limit
        :return: battery configuration in dictionary form
     """
     test_ids = []
@@ -143,13 +223,14 @@ def dieharder(args, file_size: int):
         "test-specific-settings": [],
         "omitted-tests": []}
 
-    for test_id in TEST_IDS:
+    for test in TESTS.values():
+        test_id = test.test_id
         # tests with variants
-        if test_id in {200, 201, 202, 203}:
-            entry = dieharder_test_with_variants(args, test_id, file_size)
+        if len(test.variants) > 0:
+            entry = dieharder_test_with_variants(args, test_id, file_size, limits)
         # tests with no variants
         else:
-            entry = dieharder_no_variant_test(args, test_id, file_size)
+            entry = dieharder_no_variant_test(args, test_id, file_size, limits)
 
         # The test is omitted
         if entry is None:
@@ -166,40 +247,44 @@ def dieharder(args, file_size: int):
     return result
 
 
-def dieharder_no_variant_test(args, test_id: int, file_size: int):
+def dieharder_no_variant_test(args, test_id: int, file_size: int, limits=None):
     """ Creates entry for test-specific-settings for a test with no variants.
     
     :param args: parsed command line arguments
     :param test_id: id of chosen test
     :param file_size: size of the tested file in bytes
+    :param limits: highest psamples of the tests, see utilities.apply_limit
     :return: None if the test will not be executed, empty dictionary if the
             test has settings equal to defaults, dictionary with the entry otherwise.
     """
+    descriptor = TESTS[test_id]
     psamples = calculate_psamples(args, test_id, None, file_size)
     # Test marked as bad by Dieharder, omitted by default
-    if test_id in {5, 6, 7, 14}:
+    if descriptor.omitted:
         psamples = 0
+    psamples = apply_limit(psamples, limits, test_id)
 
     if psamples == 0:
         return None
     # Tests that require no test-specific settings entry.
-    if psamples == DEFAULT_PSAMPLES and test_id not in VARIABLE_SIZE_TESTS:
+    if psamples == DEFAULT_PSAMPLES and not descriptor.variable:
         return {}
     test = {
         "test-id": test_id,
         "psamples": psamples
     }
-    if test_id in VARIABLE_SIZE_TESTS:
+    if descriptor.variable:
         test["comment"] = WARN_VARIABLE
     return test
 
 
-def dieharder_test_with_variants(args, test_id: int, file_size: int):
+def dieharder_test_with_variants(args, test_id: int, file_size: int, limits=None):
     """ Creates entry for test-specific-settings for a test with variants.
 
         :param args: parsed command line arguments
         :param test_id: id of chosen test
         :param file_size: size of the tested file in bytes
+        :param limits: highest psamples of the tests, see utilities.apply_limit
         :return: None if the test will not be executed, dictionary with the entry otherwise.
         """
     test = {
@@ -207,9 +292,8 @@ def dieharder_test_with_variants(args, test_id: int, file_size: int):
         "variants": [],
         "omitted-variants": []
     }
-    ntup_min, ntup_max = NTUPLES[test_id]
-    for ntup in range(ntup_min, ntup_max + 1):
-        variant = dieharder_variant(args, test_id, ntup, file_size)
+    for ntup in TESTS[test_id].variants:
+        variant = dieharder_variant(args, test_id, ntup, file_size, limits)
         if variant is None:
             test["omitted-variants"].append("-n {}".format(ntup))
         else:
@@ -220,7 +304,7 @@ def dieharder_test_with_variants(args, test_id: int, file_size: int):
     return test
 
 
-def dieharder_variant(args, test_id: int, ntup: int, file_size: int):
+def dieharder_variant(args, test_id: int, ntup: int, file_size: int, limits=None):
     """
     Creates the one variant setting for test entry inside test-specific-settings.
 
@@ -228,9 +312,10 @@ def dieharder_variant(args, test_id: int, ntup: int, file_size: int):
     :param test_id: int identifying the test
     :param ntup: int identifying the test variant
     :param file_size: size of the tested file in bytes
+    :param limits: highest psamples of the tests, see utilities.apply_limit
     :return: None if the variant will not be executed, dictionary with the variant entry otherwise.
     """
-    psamples = calculate_psamples(args, test_id, ntup, file_size)
+    psamples = apply_limit(calculate_psamples(args, test_id, ntup, file_size), limits, test_id, ntup)
     if psamples == 0:
         return None
     variant = {"arguments": "-n {}".format(ntup),
@@ -250,17 +335,17 @@ def dieharder_defaults(args):
     """
     defaults = {"test-ids": concatenate_test_ids(TEST_IDS),
                 "test-specific-defaults": []}
-    for test_id in TEST_IDS:
+    for descriptor in TESTS.values():
+        test_id = descriptor.test_id
         test = {"test-id": test_id,
-                "test-name": TEST_NAMES[test_id],
-                "psamples": DEFAULT_PSAMPLES}
+                "test-name": descriptor.name,
+                "psamples": descriptor.repetitions}
 
         # Tests with variants
-        if test_id in {200, 201, 202, 203}:
-            ntup_min, ntup_max = NTUPLES[test_id]
-            test["ntup-range"] = "{} - {}".format(ntup_min, ntup_max)
+        if len(descriptor.variants) > 0:
+            test["ntup-range"] = "{} - {}".format(descriptor.variants[0], descriptor.variants[-1])
             test["variants"] = []
-            for ntup in range(ntup_min, ntup_max + 1):
+            for ntup in descriptor.variants:
                 test["variants"].append({
                     "ntup": ntup,
                     "bytes-per-psample": get_bytes_per_psample(args, test_id, ntup)
@@ -269,15 +354,30 @@ def dieharder_defaults(args):
         else:
             test["bytes-per-psample"] = get_bytes_per_psample(args, test_id, None)
 
-        if test_id in {201, 204}:
-            test["psamples"] = 1000
-        elif test_id in {205, 206, 207, 208, 209, 210, 211}:
-            test["psamples"] = 1
-
-        if test_id in {13, 16, 207, 208}:
+        if descriptor.variable:
             test["comment"] = WARN_VARIABLE
-        elif test_id in {5, 6, 7, 14}:
+        elif descriptor.omitted:
             test["comment"] = WARN_OMIT
 
         defaults["test-specific-defaults"].append(test)
     return defaults
+
+
+def steps(args) -> List[Step]:
+    """
+    Returns steps (see utilities.Step) describing how the psamples of all tests
+    and variants depend on the data size. Tests omitted by default are left out.
+
+    :param args: parsed command line arguments
+    :return: list of steps of the Dieharder battery
+    """
+    extra = 1 if args.increased else 0
+    result = []
+    for test in TESTS.values():
+        # Test marked as bad by Dieharder, omitted by default
+        if test.omitted:
+            continue
+        for ntup in test.variants or (None,):
+            result.append(Step("dieharder", test.test_id, ntup, get_bytes_per_psample(args, test.test_id, ntup),
+                               1, test.offset, extra))
+    return result
@@ -1,4 +1,7 @@
 # SPDX-License-Identifier: MIT
+from typing import List
+from utilities import apply_limit, concatenate_test_ids, Step
+
 TEST_NAMES = {
     1: "NIST Statistical Testing Suite Frequency (monobits) test",
     2: "NIST Statistical Testing Suite Test For Frequency Within A Block",
@@ -19,13 +22,37 @@ TEST_NAMES = {
 
 WARN_SIZE = "WARNING - Used NIST Stream Size it too big for the data size."
 
+# Smallest stream size (in bits) recommended by NIST for all tests.
+MIN_STREAM_SIZE = 1000000
+
+# Estimated CPU time (in seconds) of one stream with 1,000,000 bits on a reference
+# node. The values are approximate and meant for planning.
+SECONDS_PER_STREAM = {
+    1: 0.001,
+    2: 0.001,
+    3: 0.003,
+    4: 0.003,
+    5: 0.003,
+    6: 0.02,
+    7: 0.04,
+    8: 0.08,
+    9: 0.01,
+    10: 0.01,
+    11: 0.03,
+    12: 0.005,
+    13: 0.005,
+    14: 0.05,
+    15: 0.15,
+}
 
-def nist_sts_test(args, file_size: int):
+
+def nist_sts_test(args, file_size: int, limits=None):
     """
     Creates configuration for NIST STS battery.
 
     :param args: Parsed program arguments.
     :param file_size: Size of file the configuration is created for (in bytes).
+    :param limits: Highest stream counts of the tests, see utilities.apply_limit.
     :return: The configuration for NIST STS battery, in dictionary form.
     """
     # No test set for execution, user must choose bigger stream size.
@@ -37,15 +64,42 @@ def nist_sts_test(args, file_size: int):
             "omitted-test": ["1-15"],
             "comment": WARN_SIZE
         }
-    return {
+    # file_size is in bytes, stream_size in bits
+    stream_count = (file_size * 8) // args.nist_stream_size
+    test_ids = []
+    omitted_ids = []
+    limited_count = stream_count
+    for test_id in range(1, 16):
+        test_count = apply_limit(stream_count, limits, test_id)
+        if test_count == 0:
+            omitted_ids.append(test_id)
+        else:
+            test_ids.append(test_id)
+            # All tests read the same streams, the lowest limit applies to all of them.
+            limited_count = min(limited_count, test_count)
+
+    result = {
         "defaults": {
-            "test-ids": ["1-15"],
+            "test-ids": concatenate_test_ids(test_ids),
             "stream-size": str(args.nist_stream_size),
-            # file_size is in bytes, stream_size in bits
-            "stream-count": str((file_size * 8) // args.nist_stream_size)
+            "stream-count": str(limited_count)
         },
         "test-specific-settings": []
     }
+    if len(omitted_ids) > 0:
+        result["omitted-test"] = concatenate_test_ids(omitted_ids)
+    return result
+
+
+def get_seconds_per_stream(args, test_id: int) -> float:
+    """
+    Returns estimated CPU time of one stream for the chosen test.
+
+    :param args: Parsed program arguments.
+    :param test_id: Int identifying the test.
+    :return: Estimated CPU time in seconds.
+    """
+    return SECONDS_PER_STREAM[test_id] * args.nist_stream_size / MIN_STREAM_SIZE
 
 
 def nist_sts_defaults(args):
@@ -64,3 +118,16 @@ def nist_sts_defaults(args):
              "bytes-per-stream": str(args.nist_stream_size // 8)}
         )
     return defaults
+
+
+def steps(args) -> List[Step]:
+    """
+        Returns steps (see utilities.Step) describing how the stream count
+        depends on the data size.
+
+        :param args: Parsed program arguments.
+        :return: list of steps of the NIST STS battery
+        """
+    # No test is executed for data smaller than the stream size, see nist_sts_test.
+    return [Step("nist-sts", test_id, None, args.nist_stream_size, 8, 0, 0, args.nist_stream_size)
+            for test_id in range(1, 16)]
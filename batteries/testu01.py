@@ -1,6 +1,7 @@
 # SPDX-License-Identifier: MIT
-from utilities import concatenate_test_ids, WARN_VARIABLE
-from typing import Optional
+from utilities import apply_limit, concatenate_test_ids, get_buffer, Step, TestDescriptor, WARN_VARIABLE
+from typing import List, Optional
+from collections import OrderedDict
 from math import log2, floor
 
 # Constants used to differentiate batteries.
@@ -515,6 +516,104 @@ RABBIT_MAX_POWERS = {6: 28, 7: 20}
 
 BIT_NB_DEFAULT = 52428800
 
+# Estimated throughput of the tests (in bytes per second) on a reference node.
+# The CPU time of one repetition is estimated from the data it reads, tests bound
+# by computation rather than reading have explicit entries below. The values are
+# approximate and meant for planning, they may differ on other machines.
+BYTES_PER_SECOND = {
+    RABBIT: 50000000,
+    ALPHABIT: 100000000,
+    BLOCK_ALPHABIT: 100000000,
+    SMALL_CRUSH: 90000000,
+    CRUSH: 40000000,
+}
+
+# Estimated CPU time (in seconds) of one repetition for computationally heavy tests.
+CRUSH_SECONDS_PER_REPETITION = {
+    1: 150.0,
+    2: 120.0,
+    11: 60.0,
+    12: 60.0,
+    13: 60.0,
+    14: 40.0,
+    15: 40.0,
+    16: 40.0,
+    17: 40.0,
+    56: 60.0,
+    57: 60.0,
+}
+
+SMALL_CRUSH_SECONDS_PER_REPETITION = {
+    1: 1.5,
+}
+
+RABBIT_SECONDS_PER_REPETITION = {
+    22: 1.0,
+    23: 2.0,
+}
+
+# Names of the batteries used in the configuration.
+BATTERY_NAMES = {
+    RABBIT: "tu01-rabbit",
+    ALPHABIT: "tu01-alphabit",
+    BLOCK_ALPHABIT: "tu01-blockalphabit",
+    SMALL_CRUSH: "tu01-smallcrush",
+    CRUSH: "tu01-crush",
+}
+
+# Tests with variable size (each run of the test uses different amount of data).
+VARIABLE_SIZE_TESTS = {
+    CRUSH: {27, 28, 29, 30, 31, 32, 33, 34, 55, 91, 92},
+    SMALL_CRUSH: {3, 5},
+    RABBIT: {20},
+}
+
+# Tests omitted by default due to bad behaviour.
+OMITTED_TESTS = {
+    CRUSH: {71, 72},
+    RABBIT: {5},
+}
+
+# Crush test 64 is technically with variable size, but due to low
+# fluctuation is treated as test with constant size.
+FLUCTUATING_TESTS = {
+    CRUSH: {64},
+}
+
+BLOCK_ALPHABIT_WIDTHS = (1, 2, 4, 8, 16, 32)
+
+
+def _descriptors(battery: int, names, units=None, params=None, seconds=None, min_bit_nb=None, variants=()):
+    descriptors = OrderedDict()
+    for test_id in sorted(names):
+        descriptors[test_id] = TestDescriptor(
+            test_id, names[test_id], None if units is None else units[test_id],
+            variable=test_id in VARIABLE_SIZE_TESTS.get(battery, ()),
+            omitted=test_id in OMITTED_TESTS.get(battery, ()),
+            variants=variants,
+            min_bit_nb=None if min_bit_nb is None else min_bit_nb[test_id],
+            params=None if params is None else params[test_id],
+            seconds=None if seconds is None else seconds.get(test_id),
+            fluctuating=test_id in FLUCTUATING_TESTS.get(battery, ()))
+    return descriptors
+
+
+# Descriptors of the tests (see utilities.TestDescriptor) of every battery, ordered by test_id.
+# Unit of Rabbit tests is valid only for the default value of bit_nb argument, Alphabit and
+# BlockAlphabit tests read bit_nb bits. BlockAlphabit test names differ for every variant,
+# see BLOCK_ALPHABIT_TEST_NAMES.
+TESTS = {
+    CRUSH: _descriptors(CRUSH, CRUSH_TEST_NAMES, CRUSH_BYTES_PER_REPETITION, CRUSH_PARAMS,
+                        CRUSH_SECONDS_PER_REPETITION),
+    SMALL_CRUSH: _descriptors(SMALL_CRUSH, SMALL_CRUSH_TEST_NAMES, SMALL_CRUSH_BYTES_PER_REPETITION,
+                              SMALL_CRUSH_PARAMS, SMALL_CRUSH_SECONDS_PER_REPETITION),
+    RABBIT: _descriptors(RABBIT, RABBIT_TEST_NAMES, RABBIT_BYTES_PER_REPETITION,
+                         seconds=RABBIT_SECONDS_PER_REPETITION, min_bit_nb=RABBIT_MIN_BIT_NB),
+    ALPHABIT: _descriptors(ALPHABIT, ALPHABIT_TEST_NAMES),
+    BLOCK_ALPHABIT: _descriptors(BLOCK_ALPHABIT, {test_id: None for test_id, _ in BLOCK_ALPHABIT_TEST_NAMES},
+                                 variants=BLOCK_ALPHABIT_WIDTHS),
+}
+
 
 # common auxiliary functions
 def get_params(battery: int, test_id: int, ) -> str:
@@ -525,11 +624,9 @@ def get_params(battery: int, test_id: int, ) -> str:
     :param test_id: Int identifying the chosen test
     :return: string containing parameters for the given test (as used by TestU01)
     """
-    if battery == CRUSH:
-        return CRUSH_PARAMS[test_id]
-    elif battery == SMALL_CRUSH:
-        return SMALL_CRUSH_PARAMS[test_id]
-    raise ValueError("Battery must be CRUSH or SMALL_CRUSH.")
+    if battery not in {CRUSH, SMALL_CRUSH}:
+        raise ValueError("Battery must be CRUSH or SMALL_CRUSH.")
+    return TESTS[battery][test_id].params
 
 
 def get_test_name(battery: int, test_id: int) -> str:
@@ -542,16 +639,10 @@ def get_test_name(battery: int, test_id: int) -> str:
     :param test_id: Int identifying the chosen test.
     :return: string containing the full test name (with parameters)
     """
-    if battery == CRUSH:
-        return CRUSH_TEST_NAMES[test_id]
-    elif battery == SMALL_CRUSH:
-        return SMALL_CRUSH_TEST_NAMES[test_id]
-    elif battery == RABBIT:
-        return RABBIT_TEST_NAMES[test_id]
-    elif battery == ALPHABIT:
-        return ALPHABIT_TEST_NAMES[test_id]
-    elif battery == BLOCK_ALPHABIT:
+    if battery == BLOCK_ALPHABIT:
         return BLOCK_ALPHABIT_TEST_NAMES[test_id]
+    elif battery in TESTS:
+        return TESTS[battery][test_id].name
     raise ValueError("Unknown battery!")
 
 
@@ -564,9 +655,32 @@ def is_variable(battery: int, test_id: int) -> bool:
     :param test_id: int identifying the chosen test (must be valid test_id for given battery)
     :return: boolean indicating if test has variable size
     """
-    return (battery == CRUSH and (27 <= test_id <= 34 or test_id in {55, 91, 92})) \
-        or (battery == SMALL_CRUSH and (test_id == 3 or test_id == 5)) \
-        or (battery == RABBIT and test_id == 20)
+    return TESTS[battery][test_id].variable
+
+
+def get_seconds_per_repetition(args, battery: int, test_id: int) -> float:
+    """
+    Returns estimated CPU time (in seconds) of one repetition of the chosen test.
+
+    :param args: Parsed program arguments.
+    :param battery: Constant identifying the battery.
+    :param test_id: int identifying the chosen test
+    :return: estimated CPU time in seconds, zero if the test is not executed
+    """
+    if battery in {ALPHABIT, BLOCK_ALPHABIT}:
+        return args.tu01_bit_nb / 8 / BYTES_PER_SECOND[battery]
+    elif battery not in {CRUSH, SMALL_CRUSH, RABBIT}:
+        raise ValueError("Unknown battery: {}".format(battery))
+
+    test = TESTS[battery][test_id]
+    if test.seconds is not None:
+        # The explicit times are given for the default bit_nb
+        if battery == RABBIT:
+            return test.seconds * args.tu01_bit_nb / BIT_NB_DEFAULT
+        return test.seconds
+    if battery == RABBIT:
+        return (rabbit_bytes_per_repetition(args, test_id) or 0) / BYTES_PER_SECOND[battery]
+    return test.unit / BYTES_PER_SECOND[battery]
 
 
 # CRUSH family
@@ -580,31 +694,27 @@ def crush_get_bytes_per_repetition(args, battery: int, test_id: int) -> int:
     :param test_id: int identifying the chosen test
     :return: int corresponding to number of bytes used in one repetition of the chosen test.
     """
-    if battery == CRUSH:
-        try:
-            needed_bytes = CRUSH_BYTES_PER_REPETITION[test_id]
-        except KeyError:
-            raise ValueError("Test id {} is invalid for Crush battery".format(test_id))
-    elif battery == SMALL_CRUSH:
-        try:
-            needed_bytes = SMALL_CRUSH_BYTES_PER_REPETITION[test_id]
-        except KeyError:
-            raise ValueError("Test id {} is invalid for SmallCrush battery".format(test_id))
-    else:
+    if battery not in {CRUSH, SMALL_CRUSH}:
         raise ValueError("Unknown battery: {}".format(battery))
+    test = TESTS[battery].get(test_id)
+    if test is None:
+        raise ValueError("Test id {} is invalid for {} battery"
+                         .format(test_id, "Crush" if battery == CRUSH else "SmallCrush"))
 
-    if is_variable(battery, test_id):
-        return int(needed_bytes * (1 + args.tu01_buffer))
-    return needed_bytes
+    if test.variable:
+        buffer = get_buffer(args, BATTERY_NAMES[battery], test_id, args.tu01_buffer)
+        return int(test.unit * (1 + buffer))
+    return test.unit
 
 
-def crush(args, battery: int, file_size: int):
+def crush(args, battery: int, file_size: int, limits=None):
     """
         Calculates battery configuration for one battery from TestU01 Crush family of batteries.
 
         :param args: Parsed program arguments.
         :param battery: Constant identifying the battery. Only CRUSH or SMALL_CRUSH.
         :param file_size: int denoting the tested file size in bytes
+        :param limits: Highest repetitions of the tests, see utilities.apply_limit.
         :return: The calculated configuration in dictionary form.
         """
     if battery not in {CRUSH, SMALL_CRUSH}:
@@ -620,13 +730,14 @@ def crush(args, battery: int, file_size: int):
         "omitted-tests": []
     }
 
-    min_id, max_id = 1, (96 if battery == CRUSH else 10)
-    for test_id in range(min_id, max_id + 1):
+    for descriptor in TESTS[battery].values():
+        test_id = descriptor.test_id
         repetitions = (file_size // crush_get_bytes_per_repetition(args, battery, test_id)) + \
                       (1 if args.increased else 0)
         # Tests omitted by default due to bad behaviour
-        if battery == CRUSH and (test_id == 71 or test_id == 72):
+        if descriptor.omitted:
             repetitions = 0
+        repetitions = apply_limit(repetitions, limits, test_id)
 
         if repetitions == 0:
             omitted_ids.append(test_id)
@@ -635,12 +746,12 @@ def crush(args, battery: int, file_size: int):
 
         # Crush test 64 is technically with variable size, but due to low
         # fluctuation is treated as test with constant size.
-        if repetitions > 1 or is_variable(battery, test_id) or (battery == CRUSH and test_id == 64):
+        if repetitions > 1 or descriptor.variable or descriptor.fluctuating:
             test = {
                 "test-id": test_id,
                 "repetitions": repetitions
             }
-            if is_variable(battery, test_id) or (battery == CRUSH and test_id == 64):
+            if descriptor.variable or descriptor.fluctuating:
                 test["comment"] = WARN_VARIABLE
             result["test-specific-settings"].append(test)
 
@@ -649,6 +760,28 @@ def crush(args, battery: int, file_size: int):
     return result
 
 
+def crush_steps(args, battery: int) -> List[Step]:
+    """
+        Returns steps (see utilities.Step) describing how the repetitions of tests from
+        one battery of Crush family depend on the data size. Tests omitted by default are left out.
+
+        :param args: Parsed program arguments.
+        :param battery: Constant identifying the battery. Only CRUSH or SMALL_CRUSH.
+        :return: list of steps of the battery
+        """
+    if battery not in {CRUSH, SMALL_CRUSH}:
+        raise ValueError("Battery in crush_steps() must be either CRUSH, or SMALL_CRUSH!")
+    extra = 1 if args.increased else 0
+    result = []
+    for test in TESTS[battery].values():
+        # Tests omitted by default due to bad behaviour
+        if test.omitted:
+            continue
+        result.append(Step(BATTERY_NAMES[battery], test.test_id, None,
+                           crush_get_bytes_per_repetition(args, battery, test.test_id), 1, 0, extra))
+    return result
+
+
 def crush_defaults(args, battery: int):
     """
            Calculates battery defaults (user information) for one battery
@@ -660,25 +793,25 @@ def crush_defaults(args, battery: int):
            """
     if battery not in {CRUSH, SMALL_CRUSH}:
         raise ValueError("Battery in Crush must be either CRUSH, or SMALL_CRUSH!")
-    min_id, max_id = 1, (96 if battery == CRUSH else 10)
     defaults = {
         "defaults": {
-            "test-ids": ["{}-{}".format(min_id, max_id)],
+            "test-ids": concatenate_test_ids(list(TESTS[battery])),
         },
         "test-specific-defaults": []
     }
 
-    for test_id in range(min_id, max_id + 1):
+    for descriptor in TESTS[battery].values():
+        test_id = descriptor.test_id
         bytes_per_repetition = crush_get_bytes_per_repetition(args, battery, test_id)
         test = {
             "test-id": test_id,
-            "test-name": get_test_name(battery, test_id),
+            "test-name": descriptor.name,
             "bytes-per-repetition": bytes_per_repetition,
-            "arguments:": get_params(battery, test_id)
+            "arguments:": descriptor.params
         }
-        if is_variable(battery, test_id) or (battery == CRUSH and test_id == 64):
+        if descriptor.variable or descriptor.fluctuating:
             test["comment"] = WARN_VARIABLE
-        if battery == CRUSH and (test_id == 71 or test_id == 72):
+        if descriptor.omitted:
             test["comment"] = WARN_BAD
         defaults["test-specific-defaults"].append(test)
     return defaults
@@ -697,21 +830,23 @@ def rabbit_bytes_per_repetition(args, test_id) -> Optional[int]:
     :return: number of bytes used in one repetition, None in case the test
     cannot be executed (either it is problematic or the bit_nb is too small for it)
     """
-    min_bit_nb = RABBIT_MIN_BIT_NB[test_id]
+    test = TESTS[RABBIT][test_id]
     # The test will not run with current bit_nb.
-    if args.tu01_bit_nb < min_bit_nb:
+    if args.tu01_bit_nb < test.min_bit_nb:
         return None
 
     # tests which take data with size of power of two
-    if test_id in {6, 7}:
+    if test_id in RABBIT_MAX_POWERS:
         power = min(RABBIT_MAX_POWERS[test_id], int(floor(log2(args.tu01_bit_nb))))
         needed_bytes = (2 ** power) // 8
     # only test with variable size
-    elif test_id == 20:
-        needed_bytes = int((args.tu01_bit_nb * 0.8) * (1 * args.tu01_buffer))
+    elif test.variable:
+        # The test reads about 80 % of bit_nb, its unit is scaled from the default bit_nb.
+        buffer = get_buffer(args, "tu01-rabbit", test_id, args.tu01_buffer)
+        needed_bytes = max(1, int(test.unit * args.tu01_bit_nb / BIT_NB_DEFAULT * (1 + buffer)))
     # test omitted due to bad behaviour, the needed bytes cannot
     # even be predicted
-    elif test_id == 5:
+    elif test.omitted:
         needed_bytes = None
     else:
         needed_bytes = args.tu01_bit_nb // 8
@@ -731,22 +866,24 @@ def rabbit_default_bytes_per_repetitions(args, test_id) -> Optional[int]:
         """
     if args.tu01_bit_nb != BIT_NB_DEFAULT:
         raise ValueError("This function may only by used for default value of bit_nb argument!")
-    needed_bytes = RABBIT_BYTES_PER_REPETITION[test_id]
+    test = TESTS[RABBIT][test_id]
     # test omitted due to bad behaviour
-    if test_id == 5:
+    if test.omitted:
         return None
-    if is_variable(RABBIT, test_id):
-        return int(needed_bytes * (1 + args.tu01_buffer))
-    return needed_bytes
+    if test.variable:
+        buffer = get_buffer(args, "tu01-rabbit", test_id, args.tu01_buffer)
+        return int(test.unit * (1 + buffer))
+    return test.unit
 
 
-def rabbit(args, file_size: int):
+def rabbit(args, file_size: int, limits=None):
     """ Calculates battery configuration for TestU01 Rabbit battery. The most problematic
         battery, because the first-level size might be chosen by the user (bit_nb argument),
         but a lot of tests from this battery read different (lesser) amount of bytes than specified.
 
         :param args: Parsed program arguments.
         :param file_size: int denoting the tested file size in bytes
+        :param limits: Highest repetitions of the tests, see utilities.apply_limit.
         :return: The calculated configuration in dictionary form.
         """
     result = {
@@ -771,7 +908,8 @@ def rabbit(args, file_size: int):
     omitted_ids = []
 
     # Tests present in Rabbit have IDs 1-26
-    for test_id in range(1, 27):
+    for descriptor in TESTS[RABBIT].values():
+        test_id = descriptor.test_id
         if args.tu01_bit_nb == BIT_NB_DEFAULT:
             bytes_per_rep = rabbit_default_bytes_per_repetitions(args, test_id)
         else:
@@ -783,19 +921,20 @@ def rabbit(args, file_size: int):
             continue
 
         repetitions = (file_size // bytes_per_rep) + (1 if args.increased else 0)
+        repetitions = apply_limit(repetitions, limits, test_id)
 
         if repetitions == 0:
             omitted_ids.append(test_id)
             continue
         test_ids.append(test_id)
 
-        if repetitions != default_repetitions or is_variable(RABBIT, test_id):
+        if repetitions != default_repetitions or descriptor.variable:
             test = {
                 "test-id": test_id,
                 "repetitions": repetitions
             }
 
-            if is_variable(RABBIT, test_id):
+            if descriptor.variable:
                 test["comment"] = WARN_VARIABLE
 
             result["test-specific-settings"].append(test)
@@ -805,6 +944,28 @@ def rabbit(args, file_size: int):
     return result
 
 
+def rabbit_steps(args) -> List[Step]:
+    """ Returns steps (see utilities.Step) describing how the repetitions of tests
+        from Rabbit battery depend on the data size. The step with test_id None
+        describes the default repetitions. Omitted tests are left out.
+
+        :param args: Parsed program arguments.
+        :return: list of steps of the Rabbit battery
+        """
+    if args.tu01_bit_nb < 500:
+        return []
+    extra = 1 if args.increased else 0
+    result = [Step(BATTERY_NAMES[RABBIT], None, None, args.tu01_bit_nb, 8, 0, 0)]
+    for test_id in TESTS[RABBIT]:
+        if args.tu01_bit_nb == BIT_NB_DEFAULT:
+            bytes_per_rep = rabbit_default_bytes_per_repetitions(args, test_id)
+        else:
+            bytes_per_rep = rabbit_bytes_per_repetition(args, test_id)
+        if bytes_per_rep is not None:
+            result.append(Step(BATTERY_NAMES[RABBIT], test_id, None, bytes_per_rep, 1, 0, extra))
+    return result
+
+
 def rabbit_defaults(args):
     """ Creates battery defaults for TestU01 Rabbit battery. The most problematic
         battery, because the first-level size might be chosen by the user (bit_nb argument),
@@ -821,7 +982,8 @@ def rabbit_defaults(args):
         "test-specific-defaults": [],
     }
 
-    for test_id in range(1, 27):
+    for descriptor in TESTS[RABBIT].values():
+        test_id = descriptor.test_id
         if args.tu01_bit_nb == BIT_NB_DEFAULT:
             bytes_per_repetition = rabbit_default_bytes_per_repetitions(args, test_id)
         else:
@@ -829,13 +991,13 @@ def rabbit_defaults(args):
 
         test = {
             "test-id": test_id,
-            "test-name": get_test_name(RABBIT, test_id)
+            "test-name": descriptor.name
         }
-        if test_id == 5:
+        if descriptor.omitted:
             test["comment"] = WARN_BAD
         elif bytes_per_repetition is None:
             test["comment"] = WARN_BIT_NB_SMALL
-        elif is_variable(RABBIT, test_id):
+        elif descriptor.variable:
             test["bytes-per-repetition"] = bytes_per_repetition
             test["comment"] = WARN_VARIABLE
         else:
@@ -845,38 +1007,61 @@ def rabbit_defaults(args):
 
 
 # ALPHABIT
-def alphabit(args, file_size: int):
+def alphabit(args, file_size: int, limits=None):
     """ Calculates battery configuration for TestU01 Alphabit battery. User may choose
         the first-level size using the bit_nb argument. The tests from this battery read
         almost exactly the amount specified by the argument.
 
         :param args: Parsed program arguments.
         :param file_size: int denoting the tested file size in bytes
+        :param limits: Highest repetitions of the tests, see utilities.apply_limit.
         :return: The calculated configuration in dictionary form.
     """
     repetitions = (file_size * 8) // args.tu01_bit_nb + (1 if args.increased else 0)
-    if repetitions == 0:
-        return {
-            "defaults": {
-                "test-ids": [],
-                "repetitions": repetitions,
-                "bit-nb": str(args.tu01_bit_nb),
-                "bit-r": "0",
-                "bit-s": "32"
-            },
-            "omitted-tests": ["1-9"]
-        }
+    limited = {test_id: apply_limit(repetitions, limits, test_id) for test_id in TESTS[ALPHABIT]}
+    # Tests limited equally do not need test specific settings.
+    if len(set(limited.values()) - {0}) == 1:
+        repetitions = max(limited.values())
+    test_ids = []
+    omitted_ids = []
+    test_settings = []
+    for test_id, test_repetitions in sorted(limited.items()):
+        if test_repetitions == 0:
+            omitted_ids.append(test_id)
+            continue
+        test_ids.append(test_id)
+        if test_repetitions != repetitions:
+            test_settings.append({
+                "test-id": test_id,
+                "repetitions": test_repetitions
+            })
 
-    return {
+    result = {
         "defaults": {
-            "test-ids": ["1-9"],
+            "test-ids": concatenate_test_ids(test_ids),
             "repetitions": repetitions,
             "bit-nb": str(args.tu01_bit_nb),
             "bit-r": "0",
             "bit-s": "32"
-        },
-        "omitted-tests": []
+        }
     }
+    # Only limited tests have test specific settings.
+    if len(test_settings) > 0:
+        result["test-specific-settings"] = test_settings
+    result["omitted-tests"] = concatenate_test_ids(omitted_ids)
+    return result
+
+
+def alphabit_steps(args) -> List[Step]:
+    """ Returns steps (see utilities.Step) describing how the repetitions of tests
+        from Alphabit battery depend on the data size.
+
+        :param args: Parsed program arguments.
+        :return: list of steps of the Alphabit battery
+    """
+    extra = 1 if args.increased else 0
+    return [Step(BATTERY_NAMES[ALPHABIT], test_id, None, args.tu01_bit_nb, 8, 0, extra)
+            for test_id in TESTS[ALPHABIT]]
 
 
 def alphabit_defaults(args):
@@ -897,10 +1082,10 @@ def alphabit_defaults(args):
         "test-specific-defaults": [],
     }
 
-    for test_id in range(1, 10):
+    for test in TESTS[ALPHABIT].values():
         result["test-specific-defaults"].append({
-            "test-id": test_id,
-            "test-name": get_test_name(ALPHABIT, test_id),
+            "test-id": test.test_id,
+            "test-name": test.name,
             "bytes-per-repetition": str(args.tu01_bit_nb // 8),
         })
 
@@ -908,19 +1093,21 @@ def alphabit_defaults(args):
 
 
 # BLOCK_ALPHABIT
-def block_alphabit(args, file_size: int):
+def block_alphabit(args, file_size: int, limits=None):
     """ Calculates battery configuration for TestU01 BlockAlphabit battery. User may choose
         the first-level size using the bit_nb argument. The tests from this battery read
         almost exactly the amount specified by the argument.
 
         :param args: Parsed program arguments.
         :param file_size: int denoting the tested file size in bytes
+        :param limits: Highest repetitions of the test variants (identified by bit_w),
+                       see utilities.apply_limit.
         :return: The calculated configuration in dictionary form.
     """
     repetitions = (file_size * 8) // args.tu01_bit_nb + (1 if args.increased else 0)
     result = {
         "defaults": {
-            "test-ids": ["1-9"],
+            "test-ids": [],
             "repetitions": repetitions,
             "bit-nb": str(args.tu01_bit_nb),
             "bit-r": "0",
@@ -929,27 +1116,50 @@ def block_alphabit(args, file_size: int):
         "test-specific-settings": [],
         "omitted-tests": []
     }
-    if repetitions == 0:
-        result["defaults"]["test-ids"] = []
-        result["omitted-tests"] = ["1-9"]
-        return result
+    test_ids = []
+    omitted_ids = []
 
     # block_alphabit contains tests with IDs 1-9
-    for test_id in range(1, 10):
+    for descriptor in TESTS[BLOCK_ALPHABIT].values():
+        test_id = descriptor.test_id
         test = {
             "test-id": test_id,
             "variants": [],
             "omitted-variants": []
         }
-        for bit_w in [1, 2, 4, 8, 16, 32]:
+        for bit_w in descriptor.variants:
+            variant_repetitions = apply_limit(repetitions, limits, test_id, bit_w)
+            if variant_repetitions == 0:
+                test["omitted-variants"].append(str(bit_w))
+                continue
             test["variants"].append({
                 "bit-w": str(bit_w),
-                "repetitions": repetitions
+                "repetitions": variant_repetitions
             })
+        if len(test["variants"]) == 0:
+            omitted_ids.append(test_id)
+            continue
+        test_ids.append(test_id)
         result["test-specific-settings"].append(test)
+
+    result["defaults"]["test-ids"] = concatenate_test_ids(test_ids)
+    result["omitted-tests"] = concatenate_test_ids(omitted_ids)
     return result
 
 
+def block_alphabit_steps(args) -> List[Step]:
+    """ Returns steps (see utilities.Step) describing how the repetitions of tests
+        from BlockAlphabit battery depend on the data size. The variants are
+        identified by the bit_w argument.
+
+        :param args: Parsed program arguments.
+        :return: list of steps of the BlockAlphabit battery
+    """
+    extra = 1 if args.increased else 0
+    return [Step(BATTERY_NAMES[BLOCK_ALPHABIT], test.test_id, bit_w, args.tu01_bit_nb, 8, 0, extra)
+            for test in TESTS[BLOCK_ALPHABIT].values() for bit_w in test.variants]
+
+
 def block_alphabit_defaults(args):
     """ Calculates battery defaults (user information) for TestU01 BlockAlphabit battery.
        User may choose the first-level size using the bit_nb argument. The tests
@@ -964,11 +1174,12 @@ def block_alphabit_defaults(args):
                 "bit-s": "32",
                 "test-specific-defaults": []
                 }
-    for test_id in range(1, 10):
+    for descriptor in TESTS[BLOCK_ALPHABIT].values():
+        test_id = descriptor.test_id
         test = {"test-id": test_id,
                 "variants": []}
 
-        for bit_w in [1, 2, 4, 8, 16, 32]:
+        for bit_w in descriptor.variants:
             test["variants"].append({
                 "bit-w": bit_w,
                 "test-name": BLOCK_ALPHABIT_TEST_NAMES[(test_id, bit_w)],
@@ -0,0 +1,278 @@
+# SPDX-License-Identifier: MIT
+from typing import Callable, Dict, List
+from timeit import Timer
+from io import StringIO
+from tempfile import TemporaryDirectory
+from collections import OrderedDict
+from sys import stderr, exit
+import subprocess
+import platform
+import argparse
+import json
+import sys
+import os
+import utilities
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# Data size of the single configuration benchmarks.
+SIZE = utilities.GIGA
+
+# Smallest total time of one measurement, the number of calls is increased until it is reached.
+MIN_TIME = 0.2
+
+# Baselines measured in the same run - the start of the bare interpreter for the process
+# benchmarks and a fixed pure Python workload for the others. The thresholds are ratios of
+# the benchmark times to the times of their baselines, so they do not depend on the machine.
+PROCESS_BASELINE = "interpreter"
+CALL_BASELINE = "python-loop"
+PROCESS_BENCHMARKS = {"startup", "import"}
+
+
+def command_line_arguments(*argv):
+    """Returns the command line arguments parsed by config_calc as if the program was started with argv."""
+    import config_calc
+    saved = sys.argv
+    sys.argv = ["config_calc.py"] + list(argv)
+    try:
+        return config_calc.parse_arguments()
+    finally:
+        sys.argv = saved
+
+
+def measure(function: Callable, repeat: int) -> Dict[str, float]:
+    """Measures the time of one call of the function. The function is called several times
+       in every measurement, so that the measurement takes at least MIN_TIME seconds.
+
+       :param function: the measured function, called without arguments
+       :param repeat: number of measurements
+       :return: dictionary with the median and the best time of one call (seconds) and the calls
+    """
+    timer = Timer(function)
+    number = 1
+    while True:
+        elapsed = timer.timeit(number)
+        if elapsed >= MIN_TIME or number >= 1 << 20:
+            break
+        number *= max(2, min(10, int(MIN_TIME / max(elapsed, 1e-9))))
+    times = sorted(time / number for time in [elapsed] + timer.repeat(repeat - 1, number))
+    return {"seconds": times[len(times) // 2], "best": times[0], "calls": number * len(times)}
+
+
+def measure_process(command: List[str], repeat: int) -> Dict[str, float]:
+    """Measures the wall-clock time of the command, see measure."""
+    def run():
+        subprocess.check_call(command, cwd=ROOT, stdout=subprocess.DEVNULL)
+    timer = Timer(run)
+    times = sorted(timer.repeat(repeat, 1))
+    return {"seconds": times[len(times) // 2], "best": times[0], "calls": repeat}
+
+
+def python_loop() -> int:
+    """The baseline workload of the in-process benchmarks - integer arithmetic, string
+       formatting and dictionary updates, as used by the computation and serialisation."""
+    counts = {}
+    for number in range(1000):
+        key = "{}-{}".format(number % 97, number // 7)
+        counts[key] = counts.get(key, 0) + number * 3 // 5
+    return len(counts)
+
+
+def batch_sizes(count: int) -> List[int]:
+    """Returns count distinct data sizes spread geometrically from 1M to 1T."""
+    return sorted({int(utilities.MEGA * utilities.MEGA ** (index / max(1, count - 1))) for index in range(count)})
+
+
+def single_benchmarks(repeat: int):
+    """Yields results (name, result) of the benchmarks of one configuration: the whole
+       create_json, the computation and the serialisation separately, and the settings
+       of the single batteries."""
+    import config_calc
+    import calculator
+    from batteries import dieharder, testu01
+
+    arguments = command_line_arguments("-s", str(SIZE), "--no-cache")
+    options = calculator.options_from_arguments(arguments)
+    yield "create-json", measure(lambda: config_calc.create_json(arguments, StringIO(), SIZE), repeat)
+    yield "compute", measure(lambda: calculator.compute_configuration(SIZE, options), repeat)
+    configuration = calculator.compute_configuration(SIZE, options)
+    yield "serialise", measure(lambda: calculator.serialise(configuration, sys.argv), repeat)
+
+    non_default = options._replace(tu01_bit_nb=1000000)
+    yield "battery-dieharder", measure(lambda: dieharder.dieharder(options, SIZE), repeat)
+    yield "battery-tu01-crush", measure(lambda: testu01.crush(options, testu01.CRUSH, SIZE), repeat)
+    yield "battery-tu01-smallcrush", measure(lambda: testu01.crush(options, testu01.SMALL_CRUSH, SIZE), repeat)
+    yield "battery-tu01-rabbit", measure(lambda: testu01.rabbit(options, SIZE), repeat)
+    yield "battery-tu01-rabbit-bit-nb", measure(lambda: testu01.rabbit(non_default, SIZE), repeat)
+
+
+def batch_benchmark(count: int, jobs: int) -> Dict[str, float]:
+    """Measures the batch mode over count data files by batch.run - the sizes are read by
+       the stat threads and the configurations are computed by the worker processes and
+       written to the NDJSON file, without the cache. The files are sparse, they take no space.
+
+       :param count: number of data files
+       :param jobs: number of worker processes
+       :return: the result, see measure, the time is given per configuration, the total
+                time and the throughput (configurations per second) are added
+    """
+    import batch
+
+    with TemporaryDirectory() as directory:
+        data_directory = os.path.join(directory, "data")
+        os.mkdir(data_directory)
+        sizes = batch_sizes(count)
+        for size in sizes:
+            with open(os.path.join(data_directory, str(size)), "wb") as data_file:
+                data_file.truncate(size)
+        arguments = command_line_arguments("-b", data_directory, "--ndjson", os.path.join(directory, "batch.ndjson"),
+                                           "--no-cache", "-j", str(jobs))
+        total = Timer(lambda: batch.run(arguments)).timeit(1)
+    return {"seconds": total / len(sizes), "best": total / len(sizes), "calls": len(sizes), "total": total,
+            "throughput": len(sizes) / total}
+
+
+def run_benchmarks(repeat: int, count: int, jobs: int) -> Dict[str, Dict[str, float]]:
+    """Runs all benchmarks.
+
+       :param repeat: number of measurements of every benchmark
+       :param count: number of data files of the batch benchmark
+       :param jobs: number of worker processes of the batch benchmark
+       :return: dictionary benchmark name -> result
+    """
+    results = OrderedDict()
+    results[PROCESS_BASELINE] = measure_process([sys.executable, "-c", "pass"], repeat)
+    results[CALL_BASELINE] = measure(python_loop, repeat)
+    results["startup"] = measure_process([sys.executable, "config_calc.py", "--help"], repeat)
+    results["import"] = measure_process([sys.executable, "-c", "import config_calc"], repeat)
+    for name, result in single_benchmarks(repeat):
+        results[name] = result
+    results["batch"] = batch_benchmark(count, jobs)
+    return results
+
+
+def check_thresholds(results: Dict[str, Dict[str, float]], thresholds: Dict[str, float], tolerance: float) -> int:
+    """Compares the ratios of the median times to the median times of their baselines (see
+       PROCESS_BASELINE and CALL_BASELINE) with the thresholds, the results are marked as passed
+       or failed.
+
+       :param results: results of the benchmarks, see run_benchmarks
+       :param thresholds: highest allowed ratios of the benchmarks to their baselines
+       :param tolerance: factor the thresholds are multiplied by, e.g. on noisy machines
+       :return: number of failed benchmarks
+    """
+    failed = 0
+    for name, result in results.items():
+        if name in {PROCESS_BASELINE, CALL_BASELINE}:
+            continue
+        result["baseline"] = PROCESS_BASELINE if name in PROCESS_BENCHMARKS else CALL_BASELINE
+        result["ratio"] = result["seconds"] / results[result["baseline"]]["seconds"]
+        if name not in thresholds:
+            continue
+        result["threshold"] = thresholds[name] * tolerance
+        result["passed"] = result["ratio"] <= result["threshold"]
+        if not result["passed"]:
+            failed += 1
+    return failed
+
+
+def parse_arguments() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="RTT Configuration calculator benchmarks.",
+        description="Measures performance of the configuration calculator."
+    )
+
+    parser.add_argument("-o", "--output",
+                        type=str,
+                        default="benchmark.json",
+                        help="Path to the file the results are written to in JSON format. Default value is \
+                              'benchmark.json'."
+                        )
+
+
+    parser.add_argument("--thresholds",
+                        type=str,
+                        default=os.path.join(ROOT, "benchmark_thresholds.json"),
+                        help="Path to the JSON file with the highest allowed ratios of the benchmark times to \
+                              the times of their baselines. Default value is 'benchmark_thresholds.json' next to \
+                              this script."
+                        )
+
+
+    parser.add_argument("--tolerance",
+                        type=float,
+                        default=1.0,
+                        help="Factor the thresholds are multiplied by, useful on noisy machines. \
+                              Default value is 1.0."
+                        )
+
+
+    parser.add_argument("--repeat",
+                        type=int,
+                        default=5,
+                        help="Number of measurements of every benchmark. Default value is 5."
+                        )
+
+
+    parser.add_argument("--batch-sizes",
+                        type=int,
+                        default=10000,
+                        help="Number of data files of the batch benchmark. Default value is 10000."
+                        )
+
+
+    parser.add_argument("--batch-jobs",
+                        type=int,
+                        default=2,
+                        help="Number of worker processes of the batch benchmark. Default value is 2."
+                        )
+
+    arguments = parser.parse_args()
+    if arguments.repeat < 1:
+        parser.error("argument --repeat: the number of measurements must be positive")
+    if arguments.batch_sizes < 1:
+        parser.error("argument --batch-sizes: the number of data files must be positive")
+    if arguments.batch_jobs < 2:
+        parser.error("argument --batch-jobs: at least 2 worker processes are needed to measure the pool")
+    if arguments.tolerance <= 0:
+        parser.error("argument --tolerance: the factor must be positive")
+    return arguments
+
+
+def main(arguments) -> None:
+    try:
+        with open(arguments.thresholds) as thresholds_file:
+            thresholds = json.load(thresholds_file)
+    except OSError:
+        thresholds = {}
+    except ValueError as error:
+        print("Invalid thresholds {}: {}".format(arguments.thresholds, error), file=stderr)
+        exit(-1)
+
+    results = run_benchmarks(arguments.repeat, arguments.batch_sizes, arguments.batch_jobs)
+    failed = check_thresholds(results, thresholds, arguments.tolerance)
+    for name, result in results.items():
+        print("{:<28}{:>12.6f} s{}{}{}".format(
+            name, result["seconds"],
+            "  {:10.3f} x {}".format(result["ratio"], result["baseline"]) if "ratio" in result else "",
+            "  ({:.0f} configurations/s)".format(result["throughput"]) if "throughput" in result else "",
+            "" if "passed" not in result else "  ok" if result["passed"] else
+            "  REGRESSION (threshold {:.3f} x)".format(result["threshold"])))
+
+    with open(arguments.output, "w") as output:
+        json.dump({"python": platform.python_version(),
+                   "platform": platform.platform(),
+                   "batch-sizes": arguments.batch_sizes,
+                   "batch-jobs": arguments.batch_jobs,
+                   "tolerance": arguments.tolerance,
+                   "passed": failed == 0,
+                   "benchmarks": results}, output, indent=4, sort_keys=True)
+        output.write("\n")
+
+    if failed > 0:
+        print("{} of {} benchmarks exceeded their thresholds.".format(failed, len(results)), file=stderr)
+        exit(-1)
+
+
+if __name__ == "__main__":
+    main(parse_arguments())
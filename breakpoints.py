@@ -0,0 +1,85 @@
+# SPDX-License-Identifier: MIT
+from typing import List, Optional, Tuple
+from bisect import bisect_right
+from utilities import Step
+import registry
+
+
+def all_steps(args) -> List[Step]:
+    """Returns steps (see utilities.Step) of all tests from the chosen batteries.
+       The configuration of the batteries changes only at data sizes where
+       the count of at least one step changes.
+
+       :param args: parsed command line arguments
+       :return: list of steps of all batteries
+    """
+    steps = []
+    for battery in registry.selected(args):
+        steps += battery.steps(args)
+    return steps
+
+
+def interval(steps: List[Step], file_size: int) -> Tuple[int, int]:
+    """Returns the interval of data sizes which share the configuration with
+       the given data size. Computed directly from the steps, no index is needed.
+
+       :param steps: steps of the tests, see all_steps
+       :param file_size: size of the tested file in bytes
+       :return: tuple (start, end), all data sizes start <= size < end have the same configuration
+    """
+    start, end = 0, None
+    for step in steps:
+        count = step.count(file_size)
+        start = max(start, step.first_size(count))
+        next_size = step.first_size(count + 1)
+        if end is None or next_size < end:
+            end = next_size
+    return start, end
+
+
+class ConfigIndex:
+    """Index of configurations for one set of options. The data sizes sharing the configuration
+       form intervals (see interval), the configuration is computed on the first lookup of a size
+       inside the interval and cached with it. Every other lookup in a known interval is a binary
+       search over the starts of the intervals. When more than max_intervals are known, the index
+       is cleared. The cached configurations are shared, do not modify them."""
+
+    def __init__(self, options, max_intervals: int = 1024):
+        self.options = options
+        self.max_intervals = max_intervals
+        self.steps = all_steps(options)
+        # Sorted starts of the known intervals, their ends and configurations at the same positions
+        self.starts = []
+        self.ends = []
+        self.configurations = []
+
+    def interval(self, file_size: int) -> Tuple[int, int]:
+        """Returns the interval [start, end) of sizes sharing the configuration with file_size."""
+        position = self._position(file_size)
+        if position is not None:
+            return self.starts[position], self.ends[position]
+        return interval(self.steps, file_size)
+
+    def lookup(self, file_size: int):
+        """Returns the configuration for the given data size, see calculator.compute_configuration."""
+        # Imported here, the calculator depends on this module.
+        import calculator
+
+        position = self._position(file_size)
+        if position is None:
+            start, end = interval(self.steps, file_size)
+            if len(self.starts) >= self.max_intervals:
+                self.starts, self.ends, self.configurations = [], [], []
+            items = [(name, value) for name, value in calculator.compute_configuration(file_size, self.options).items()
+                     if name != "data-size"]
+            position = bisect_right(self.starts, start)
+            self.starts.insert(position, start)
+            self.ends.insert(position, end)
+            self.configurations.insert(position, items)
+        return dict([("data-size", file_size)] + self.configurations[position])
+
+    def _position(self, file_size: int) -> Optional[int]:
+        position = bisect_right(self.starts, file_size) - 1
+        if position >= 0 and file_size < self.ends[position]:
+            return position
+        return None
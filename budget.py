@@ -0,0 +1,116 @@
+# SPDX-License-Identifier: MIT
+from typing import Dict
+from utilities import apply_limit, concatenate_test_ids, expand_test_ids
+import breakpoints
+import runtime
+
+WARN_TIME_BUDGET = "WARNING - Some tests were omitted or their psamples (repetitions) lowered to fit the time \
+budget, see budget-omitted-tests and budget-lowered-tests."
+
+# Reasons of the changes made by the time budget, given for every test (variant).
+REASON_OMITTED = "One psample (repetition) of the test is among the most expensive ones, which do not fit the \
+time budget."
+REASON_LOWERED = "The psamples (repetitions) were lowered by the common ratio to fit the time budget."
+
+
+def budget_limits(args, file_size: int, budget: float, limits=None) -> Dict[str, dict]:
+    """Computes limits of psamples (repetitions), so the estimated CPU time of all tests
+       fits the time budget. The tests with the most expensive single psample (repetition)
+       are omitted first, until every remaining test fits with at least one psample.
+       Psamples of the remaining tests are then lowered by a common ratio.
+
+       :param args: parsed command line arguments
+       :param file_size: size of the tested file in bytes
+       :param budget: the time budget in seconds
+       :param limits: limits already applied to the tests, see utilities.apply_limit
+       :return: the limits of the tests for every battery (battery name -> limits),
+                only lowered tests are present
+    """
+    limits = limits or {}
+    # tuples (step, count, seconds per psample)
+    tests = []
+    for step in breakpoints.all_steps(args):
+        # Rabbit defaults are not a test
+        if step.test_id is None:
+            continue
+        count = apply_limit(step.count(file_size), limits.get(step.battery), step.test_id, step.variant)
+        if count > 0:
+            tests.append((step, count, runtime.seconds_per_unit(args, step)))
+
+    result = {}
+    tests.sort(key=lambda test: test[2])
+    while len(tests) > 0 and sum(test[2] for test in tests) > budget:
+        step, _, _ = tests.pop()
+        result.setdefault(step.battery, {})[(step.test_id, step.variant)] = 0
+
+    def scaled_time(ratio: float) -> float:
+        return sum(max(1, int(count * ratio)) * seconds for _, count, seconds in tests)
+
+    if scaled_time(1) > budget:
+        low, high = 0.0, 1.0
+        for _ in range(64):
+            middle = (low + high) / 2
+            if scaled_time(middle) <= budget:
+                low = middle
+            else:
+                high = middle
+        for step, count, _ in tests:
+            result.setdefault(step.battery, {})[(step.test_id, step.variant)] = max(1, int(count * low))
+    return result
+
+
+def annotate(configurations, limits: Dict[str, dict], args, file_size: int) -> None:
+    """Lists the tests omitted and lowered by the time budget in the settings of every
+       affected battery, each with its reason. The budget-omitted tests are listed under
+       budget-omitted-tests and removed from the omitted tests (variants) of the battery,
+       which keep only the tests omitted regardless of the budget. The lowered tests are
+       listed under budget-lowered-tests with the counts with and without the budget.
+
+       :param configurations: configurations of the batteries, see calculator.battery_configurations,
+                              batteries missing in the configurations are skipped
+       :param limits: the limits computed by budget_limits
+       :param args: parsed command line arguments
+       :param file_size: size of the tested file in bytes
+    """
+    counts = None
+    for battery, battery_limits in limits.items():
+        settings = configurations.get(battery + "-settings")
+        if settings is None:
+            continue
+        if counts is None:
+            counts = {(step.battery, step.test_id, step.variant): step.count(file_size)
+                      for step in breakpoints.all_steps(args) if step.test_id is not None}
+        omitted = sorted(test for test, limit in battery_limits.items() if limit == 0)
+        lowered = sorted((test, limit) for test, limit in battery_limits.items()
+                         if 0 < limit < counts.get((battery,) + test, 0))
+        if len(omitted) == 0 and len(lowered) == 0:
+            continue
+
+        omitted_ids = {test_id for test_id, _ in omitted}
+        # NIST STS names the list omitted-test.
+        for key in ["omitted-tests", "omitted-test"]:
+            if key in settings:
+                settings[key] = concatenate_test_ids([test_id for test_id in expand_test_ids(settings[key])
+                                                      if test_id not in omitted_ids])
+        omitted_variants = {"-n {}".format(variant) for _, variant in omitted if variant is not None}
+        for test in settings.get("test-specific-settings", []):
+            if test.get("test-id") in omitted_ids and "omitted-variants" in test:
+                test["omitted-variants"] = [variant for variant in test["omitted-variants"]
+                                            if variant not in omitted_variants]
+
+        settings["budget-omitted-tests"] = [_budget_entry(test_id, variant, {"reason": REASON_OMITTED})
+                                            for test_id, variant in omitted]
+        settings["budget-lowered-tests"] = [
+            _budget_entry(test_id, variant, {"count": limit,
+                                             "count-without-budget": counts[(battery, test_id, variant)],
+                                             "reason": REASON_LOWERED})
+            for (test_id, variant), limit in lowered]
+        settings["comment"] = WARN_TIME_BUDGET
+
+
+def _budget_entry(test_id: int, variant, values: dict) -> dict:
+    entry = {"test-id": test_id}
+    if variant is not None:
+        entry["variant"] = variant
+    entry.update(values)
+    return entry
@@ -0,0 +1,175 @@
+# SPDX-License-Identifier: MIT
+from typing import Optional
+from hashlib import sha256
+import json
+import os
+
+# Source files the configuration depends on, any change of them invalidates the cache.
+SOURCES = ["calculator.py", "utilities.py", "runtime.py", "budget.py", "breakpoints.py", "shards.py",
+           "registry.py", "batteries/dieharder.py", "batteries/nist_sts.py", "batteries/testu01.py"]
+
+# File with the total size of the cache entries, in the cache directory.
+TOTAL_FILE = "total"
+
+# Eviction frees 1/EVICTION_RESERVE of the maximal size more than needed.
+EVICTION_RESERVE = 16
+
+_sources_digest = None
+
+
+def default_directory() -> str:
+    """Returns the default cache directory, respects XDG_CACHE_HOME."""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "rtt-config-calc")
+
+
+def sources_digest() -> str:
+    """Returns digest of the source files the configuration depends on, computed once per process."""
+    global _sources_digest
+    if _sources_digest is None:
+        digest = sha256()
+        root = os.path.dirname(os.path.abspath(__file__))
+        for source in SOURCES:
+            with open(os.path.join(root, source), "rb") as source_file:
+                digest.update(source_file.read())
+        _sources_digest = digest.hexdigest()
+    return _sources_digest
+
+
+def cache_key(arguments, file_size: int, compact: bool = False, defaults: bool = True) -> str:
+    """Returns the cache key of the configuration - digest of the normalised arguments
+       affecting the configuration, of the data size and of the output format.
+
+       :param arguments: parsed command line arguments
+       :param file_size: size of the tested file in bytes
+       :param compact: whether the configuration is serialised without indentation
+       :param defaults: whether the configuration contains the battery defaults
+       :return: the key as hexadecimal string
+    """
+    normalised = [sources_digest(),
+                  bool(arguments.increased),
+                  float(arguments.dieharder_buffer),
+                  int(arguments.nist_stream_size),
+                  float(arguments.tu01_buffer),
+                  int(arguments.tu01_bit_nb),
+                  None if arguments.time_budget is None else float(arguments.time_budget),
+                  None if arguments.batteries is None else list(arguments.batteries),
+                  None if arguments.buffers is None else [list(buffer) for buffer in arguments.buffers],
+                  int(file_size),
+                  bool(compact),
+                  bool(defaults)]
+    return sha256(json.dumps(normalised).encode()).hexdigest()
+
+
+class ConfigCache:
+    """Persistent cache of serialised configurations. Every entry is stored in its own
+       file named by the cache key. The total size of the entries is kept in the file
+       TOTAL_FILE, when it exceeds the maximal size, the least recently used entries are
+       removed. The cache may be shared by several processes, the total is recounted on
+       every eviction, so the updates lost by concurrent writers are corrected."""
+
+    def __init__(self, directory: str, max_size: int):
+        self.directory = directory
+        self.max_size = max_size
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key + ".json")
+
+    def get(self, key: str) -> Optional[str]:
+        """Returns the cached configuration, None if it is not cached."""
+        path = self._path(key)
+        try:
+            with open(path) as entry:
+                body = entry.read()
+            # The modification time marks the last use
+            os.utime(path)
+        except OSError:
+            return None
+        return body
+
+    def put(self, key: str, body: str) -> None:
+        """Stores the configuration in the cache, errors are ignored."""
+        path = self._path(key)
+        temporary = "{}.{}.tmp".format(path, os.getpid())
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(temporary, "w") as entry:
+                entry.write(body)
+            added = os.stat(temporary).st_size
+            try:
+                added -= os.stat(path).st_size
+            except OSError:
+                pass
+            os.replace(temporary, path)
+        except OSError:
+            return
+        total = self.read_total()
+        if total is None or total + added > self.max_size:
+            self.evict()
+        else:
+            self._write_total(total + added)
+
+    def read_total(self) -> Optional[int]:
+        """Returns the total size of the entries in bytes, None if it is not known."""
+        try:
+            with open(os.path.join(self.directory, TOTAL_FILE)) as total_file:
+                return int(total_file.read())
+        except (OSError, ValueError):
+            return None
+
+    def _write_total(self, total: int) -> None:
+        path = os.path.join(self.directory, TOTAL_FILE)
+        temporary = "{}.{}.tmp".format(path, os.getpid())
+        try:
+            with open(temporary, "w") as total_file:
+                total_file.write(str(total))
+            os.replace(temporary, path)
+        except OSError:
+            pass
+
+    def evict(self) -> None:
+        """Recounts the total size of the entries and removes the least recently used ones
+           until the cache fits its maximal size without the eviction reserve, so the next
+           eviction is not needed right after."""
+        entries = []
+        total = 0
+        for root, _, files in os.walk(self.directory):
+            # The entries are in the subdirectories, the total is not an entry.
+            if root == self.directory:
+                continue
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    status = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((status.st_mtime, status.st_size, path))
+                total += status.st_size
+
+        if total > self.max_size:
+            entries.sort()
+            for _, size, path in entries:
+                if total <= self.max_size - self.max_size // EVICTION_RESERVE:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total -= size
+        self._write_total(total)
+
+
+# Caches opened by this process, see open_cache.
+_caches = {}
+
+
+def open_cache(directory: str, max_size: int) -> ConfigCache:
+    """Returns the cache in the directory, one instance is shared by the whole process.
+
+       :param directory: directory of the cache
+       :param max_size: maximal size of the cache in bytes
+       :return: the cache
+    """
+    if (directory, max_size) not in _caches:
+        _caches[(directory, max_size)] = ConfigCache(directory, max_size)
+    return _caches[(directory, max_size)]
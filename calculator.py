@@ -0,0 +1,250 @@
+# SPDX-License-Identifier: MIT
+from collections import namedtuple
+from itertools import chain
+from types import GeneratorType
+from functools import lru_cache
+import json
+import budget
+import profiling
+import registry
+import runtime
+import shards
+
+# Options of the calculation. Immutable, so it may be shared between threads and used
+# as a dictionary key. Attributes have the same names as the parsed command line arguments,
+# so the options may be passed to all battery functions. The batteries are a tuple of
+# battery names (see registry.BATTERIES), None for all batteries. The buffers are calibrated
+# buffers of variable size tests (see calibration.load_buffers), None for the flat buffers.
+Options = namedtuple("Options", ["increased", "dieharder_buffer", "nist_stream_size", "tu01_buffer",
+                                 "tu01_bit_nb", "time_budget", "batteries", "buffers"])
+Options.__new__.__defaults__ = (False, 0.001, 1000000, 0.01, 52428800, None, None, None)
+
+
+def options_from_arguments(arguments) -> Options:
+    """Returns options of the calculation taken from the parsed command line arguments.
+
+       :param arguments: parsed command line arguments
+       :return: the options
+    """
+    return Options(*[getattr(arguments, field) for field in Options._fields])
+
+
+def configuration_items(file_size: int, options: Options = Options(), shard=None, defaults: bool = True):
+    """Yields items (name, value) of the configuration, except the command line options.
+       The value of the randomness-testing-toolkit item is a generator of the battery
+       sections, so every section is computed only when it is needed.
+
+       :param file_size: size of the tested file in bytes
+       :param options: options of the calculation
+       :param shard: the shard of tests the configuration is created for (see
+                     shards.create_shards), None for all tests
+       :param defaults: whether the battery defaults are included, see battery_sections
+    """
+    limits = None
+    if options.time_budget is not None:
+        with profiling.stage("budget"):
+            limits = budget.budget_limits(options, file_size, options.time_budget)
+    battery_limits = limits
+    if shard is not None:
+        battery_limits = shards.merge_limits(limits, shard.limits)
+
+    yield "data-size", file_size
+    yield "randomness-testing-toolkit", _annotated(battery_sections(options, file_size, battery_limits, defaults),
+                                                        limits, options, file_size)
+    with profiling.stage("runtime-estimate"):
+        estimate = runtime.estimate(options, file_size, battery_limits)
+    yield "runtime-estimate", estimate
+    if shard is not None:
+        yield "shard", {
+            "index": shard.index,
+            "count": shard.count,
+            "comment": shards.WARN_SHARD
+        }
+
+
+def _annotated(sections, limits, options, file_size: int):
+    for name, section in sections:
+        if limits is not None:
+            budget.annotate({name: section}, limits, options, file_size)
+        yield name, section
+
+
+def compute_configuration(file_size: int, options: Options = Options(), shard=None, defaults: bool = True):
+    """Computes the whole configuration for the given data size, except the command
+       line options. The function has no side effects and may be called from several
+       threads at once. The battery defaults are shared by all configurations with the
+       same options, do not modify them.
+
+       :param file_size: size of the tested file in bytes
+       :param options: options of the calculation
+       :param shard: the shard of tests the configuration is created for (see
+                     shards.create_shards), None for all tests
+       :param defaults: whether the battery defaults are included, see battery_sections
+       :return: the configuration in dictionary form
+    """
+    return {name: dict(value) if isinstance(value, GeneratorType) else value
+            for name, value in configuration_items(file_size, options, shard, defaults)}
+
+
+def battery_configurations(options: Options, file_size: int, limits=None):
+    """Creates configurations of the chosen batteries (the randomness-testing-toolkit
+       section of the configuration file).
+
+       :param options: options of the calculation (or parsed command line arguments)
+       :param file_size: size of the tested file in bytes
+       :param limits: limits of psamples (repetitions) for every battery (battery
+                      name -> limits), see utilities.apply_limit
+       :return: the configurations of all batteries in dictionary form
+    """
+    return dict(battery_sections(options, file_size, limits))
+
+
+def battery_sections(options: Options, file_size: int, limits=None, defaults: bool = True):
+    """Yields sections (name, configuration) of the chosen batteries in the order of the
+       configuration file, every section is computed only when it is needed.
+
+       :param options: options of the calculation (or parsed command line arguments)
+       :param file_size: size of the tested file in bytes
+       :param limits: limits of psamples (repetitions) for every battery, see battery_configurations
+       :param defaults: whether the defaults sections are included, RTT needs them unless they
+                        are supplied separately (see defaults_items)
+    """
+    limits = limits or {}
+    for battery in registry.selected(options):
+        with profiling.stage("settings:" + battery.name):
+            section = battery.settings(options, file_size, limits.get(battery.name))
+        yield battery.name + "-settings", section
+        if defaults:
+            with profiling.stage("defaults:" + battery.name):
+                section = _defaults(options, battery)
+            yield battery.name + "-defaults", section
+
+
+def _defaults(options, battery: registry.Battery):
+    # Parsed command line arguments are not hashable, only options are memoised.
+    if isinstance(options, Options):
+        return battery_defaults(options, battery.name)
+    return battery.defaults(options)
+
+
+@lru_cache(maxsize=64)
+def battery_defaults(options: Options, battery: str):
+    """Returns the defaults section of the battery. The defaults depend only on the options,
+       so they are computed once per options and shared, do not modify them.
+
+       :param options: options of the calculation
+       :param battery: name of the battery, see registry.BATTERIES
+       :return: the defaults in dictionary form
+    """
+    return registry.get(battery).defaults(options)
+
+
+def defaults_items(options: Options = Options()):
+    """Yields the only item (name, value) of the configuration with defaults of the chosen
+       batteries, which complements the configurations created without defaults.
+
+       :param options: options of the calculation
+    """
+    yield "randomness-testing-toolkit", ((battery.name + "-defaults", _defaults(options, battery))
+                                         for battery in registry.selected(options))
+
+
+def serialise(configuration, command_line=None, compact: bool = False) -> str:
+    """Serialises the configuration to the JSON format used by RTT.
+
+       :param configuration: the configuration, see compute_configuration
+       :param command_line: command line options stored in the configuration, may be None
+       :param compact: serialises the configuration without indentation
+       :return: the serialised configuration
+    """
+    if command_line is not None:
+        configuration = dict([("options", command_line)] + list(configuration.items()))
+    with profiling.stage("serialise"):
+        if compact:
+            return json.dumps(configuration, separators=(",", ":"))
+        return json.dumps(configuration, indent=4)
+
+
+def stream_configuration(json_file, file_size: int, options: Options = Options(), shard=None,
+                         command_line=None, compact: bool = False, defaults: bool = True, prefix=()) -> None:
+    """Computes the configuration and writes it to the file section by section, so the
+       whole configuration is never held in memory. The indented output is equal to
+       serialise, the compact output has no whitespace. Both are accepted by RTT.
+
+       :param json_file: the file (stream) the configuration is written to
+       :param file_size: size of the tested file in bytes
+       :param options: options of the calculation
+       :param shard: the shard of tests, see compute_configuration
+       :param command_line: command line options stored in the configuration, may be None
+       :param compact: writes the configuration without indentation
+       :param defaults: whether the battery defaults are included, see battery_sections
+       :param prefix: items (name, value) written before the command line options, e.g. the batch input
+    """
+    write_items(json_file, configuration_items(file_size, options, shard, defaults), command_line, compact, prefix)
+
+
+def write_items(json_file, items, command_line=None, compact: bool = False, prefix=()) -> None:
+    """Writes the items (see configuration_items and defaults_items) to the file as JSON object.
+
+       :param json_file: the file (stream) the object is written to
+       :param items: iterable of items (name, value), the values which are generators of
+                     items are written as nested objects
+       :param command_line: command line options stored as the first item, may be None
+       :param compact: writes the object without indentation
+       :param prefix: items (name, value) written before the command line options
+    """
+    if command_line is not None:
+        items = chain([("options", command_line)], items)
+    _write_object(json_file, chain(prefix, items), 0, compact)
+
+
+def write_serialised(json_file, items, serialised: str, compact: bool = False) -> None:
+    """Writes the items followed by the items of the object serialised by write_items
+       (e.g. a cached configuration) to the file as one JSON object. The result is equal
+       to the object written by write_items with the items first.
+
+       :param json_file: the file (stream) the object is written to
+       :param items: iterable of items (name, value) written first
+       :param serialised: the serialised object
+       :param compact: whether the object is serialised without indentation
+    """
+    if not serialised.startswith("{") or not serialised.endswith("}"):
+        raise ValueError("The serialised value is not a JSON object.")
+    empty = _write_items(json_file, items, 0, compact)
+    # The remaining items are written as they are, with their indentation.
+    if serialised[1:-1].strip() != "":
+        json_file.write(("" if empty else ",") + serialised[1:])
+        return
+    if not empty and not compact:
+        json_file.write("\n")
+    json_file.write("}")
+
+
+def _write_object(json_file, items, level: int, compact: bool) -> None:
+    empty = _write_items(json_file, items, level, compact)
+    if not empty and not compact:
+        json_file.write("\n" + "    " * level)
+    json_file.write("}")
+
+
+def _write_items(json_file, items, level: int, compact: bool) -> bool:
+    # Writes the opening brace and the items, returns whether there were no items.
+    indent = "\n" + "    " * (level + 1)
+    empty = True
+    json_file.write("{")
+    for name, value in items:
+        if not empty:
+            json_file.write(",")
+        if not compact:
+            json_file.write(indent)
+        json_file.write(json.dumps(name) + (":" if compact else ": "))
+        if isinstance(value, GeneratorType):
+            _write_object(json_file, value, level + 1, compact)
+        else:
+            with profiling.stage("serialise"):
+                if compact:
+                    json_file.write(json.dumps(value, separators=(",", ":")))
+                else:
+                    json_file.write(json.dumps(value, indent=4).replace("\n", indent))
+        empty = False
+    return empty
@@ -0,0 +1,169 @@
+# SPDX-License-Identifier: MIT
+from typing import Dict, List, Optional, Tuple
+from glob import glob
+from math import ceil, erf, sqrt
+import json
+import os
+
+# Version of the format of the calibration tables.
+FORMAT_VERSION = 1
+
+# Lowest number of samples of a test, fewer samples do not describe the distribution.
+MIN_SAMPLES = 30
+
+# Lowest fitted buffer, the lowest flat buffer (--dieharder-buffer). A zero buffer leaves no
+# margin for psamples reading more than the sampled ones.
+MIN_BUFFER = 0.001
+
+
+def nominal_bytes(battery: str, test_id: int, bit_nb: Optional[int] = None) -> int:
+    """Returns the nominal number of bytes used by one psample (repetition) of the
+       variable size test, as given by the tables of the batteries.
+
+       :param battery: name of the battery, e.g. 'dieharder' or 'tu01-crush'
+       :param test_id: int identifying the test
+       :param bit_nb: bit_nb argument of the Rabbit battery, the default value if None
+       :return: the nominal number of bytes
+    """
+    from batteries import dieharder, testu01
+    tables = {
+        "dieharder": dieharder.TESTS,
+        "tu01-crush": testu01.TESTS[testu01.CRUSH],
+        "tu01-smallcrush": testu01.TESTS[testu01.SMALL_CRUSH],
+        "tu01-rabbit": testu01.TESTS[testu01.RABBIT],
+    }
+    test = tables[battery].get(test_id) if battery in tables else None
+    if test is not None and test.variable:
+        # Rabbit tests read a part of bit_nb, the unit is given for the default value.
+        if battery == "tu01-rabbit" and bit_nb is not None:
+            return int(test.unit * bit_nb / testu01.BIT_NB_DEFAULT)
+        return test.unit
+    raise ValueError("Test {} of {} does not use variable amount of data.".format(test_id, battery))
+
+
+def read_samples(sources: str) -> Dict[Tuple[str, int], List[int]]:
+    """Reads consumption samples from the log files. Every line of the log holds the battery
+       name, the test ID and the number of bytes read by one psample (repetition), separated
+       by whitespace, e.g. 'dieharder 13 153692'. Empty lines and lines starting with '#'
+       are ignored.
+
+       :param sources: comma separated paths or glob patterns of the log files
+       :return: dictionary (battery, test_id) -> list of samples
+    """
+    samples = {}
+    for source in sources.split(","):
+        paths = sorted(glob(source))
+        if len(paths) == 0:
+            raise ValueError("No log file matches {}.".format(source))
+        for path in paths:
+            with open(path) as log:
+                for number, line in enumerate(log, 1):
+                    line = line.strip()
+                    if line == "" or line.startswith("#"):
+                        continue
+                    parts = line.split()
+                    if len(parts) != 3 or not parts[1].isnumeric() or not parts[2].isnumeric():
+                        raise ValueError("{}:{}: invalid sample '{}'.".format(path, number, line))
+                    samples.setdefault((parts[0], int(parts[1])), []).append(int(parts[2]))
+    return samples
+
+
+def normal_quantile(confidence: float) -> float:
+    """Returns quantile of the standard normal distribution, found by bisection."""
+    low, high = -10.0, 10.0
+    for _ in range(100):
+        middle = (low + high) / 2
+        if (1 + erf(middle / sqrt(2))) / 2 < confidence:
+            low = middle
+        else:
+            high = middle
+    return high
+
+
+def fit(battery: str, test_id: int, samples: List[int], confidence: float, bit_nb: Optional[int] = None):
+    """Fits normal distribution to the samples of the test and derives its buffer - relative
+       excess of the quantile at the confidence level (or of the highest sample, if it is
+       higher) over the nominal bytes per psample (repetition). The buffer is at least MIN_BUFFER.
+
+       :param battery: name of the battery
+       :param test_id: int identifying the test
+       :param samples: bytes read by single psamples (repetitions), at least MIN_SAMPLES
+       :param confidence: the confidence level, e.g. 0.999
+       :param bit_nb: bit_nb argument of the sampled Rabbit runs, see nominal_bytes
+       :return: the fitted test in dictionary form, as stored in the table
+    """
+    if len(samples) < MIN_SAMPLES:
+        raise ValueError("Test {} of {} has {} samples, at least {} are needed.".format(test_id, battery, len(samples),
+                                                                                        MIN_SAMPLES))
+    nominal = nominal_bytes(battery, test_id, bit_nb)
+    mean = sum(samples) / len(samples)
+    variance = sum((sample - mean) ** 2 for sample in samples) / max(1, len(samples) - 1)
+    bound = max(mean + normal_quantile(confidence) * sqrt(variance), max(samples))
+    return {
+        "battery": battery,
+        "test-id": test_id,
+        "samples": len(samples),
+        "mean": round(mean, 1),
+        "stddev": round(sqrt(variance), 1),
+        # Rounded up, so the buffer never gets lower than the fitted one.
+        "buffer": max(MIN_BUFFER, ceil((bound / nominal - 1) * 10 ** 6) / 10 ** 6)
+    }
+
+
+def calibrate(sources: str, table: str, confidence: float, bit_nb: Optional[int] = None) -> dict:
+    """Fits buffers of all tests with samples in the logs and writes them to the table.
+       Existing table is replaced by a new version, the previous version is kept beside it
+       as TABLE.vN, where N is its version.
+
+       :param sources: comma separated paths or glob patterns of the log files, see read_samples
+       :param table: path to the calibration table
+       :param confidence: the confidence level, e.g. 0.999
+       :param bit_nb: bit_nb argument of the sampled Rabbit runs, see nominal_bytes
+       :return: the written table in dictionary form
+    """
+    previous = load_table(table) if os.path.exists(table) else None
+    tests = [fit(battery, test_id, samples, confidence, bit_nb)
+             for (battery, test_id), samples in sorted(read_samples(sources).items())]
+    version = 1
+    if previous is not None:
+        version = previous["version"] + 1
+        os.replace(table, "{}.v{}".format(table, previous["version"]))
+    result = {
+        "format": FORMAT_VERSION,
+        "version": version,
+        "confidence": confidence,
+        "tests": tests
+    }
+    with open(table, "w") as table_file:
+        json.dump(result, table_file, indent=4)
+    return result
+
+
+def load_table(table: str) -> dict:
+    """Reads the calibration table and checks its format and the keys of the table and its tests.
+
+       :param table: path to the calibration table
+       :return: the table in dictionary form
+    """
+    with open(table) as table_file:
+        result = json.load(table_file)
+    if not isinstance(result, dict) or result.get("format") != FORMAT_VERSION:
+        raise ValueError("Calibration table {} has unsupported format.".format(table))
+    if not isinstance(result.get("version"), int) or not isinstance(result.get("confidence"), (int, float)) \
+            or not isinstance(result.get("tests"), list):
+        raise ValueError("Calibration table {} has missing or invalid version, confidence or tests.".format(table))
+    for test in result["tests"]:
+        if not isinstance(test, dict) or not isinstance(test.get("battery"), str) \
+                or not isinstance(test.get("test-id"), int) or not isinstance(test.get("buffer"), (int, float)):
+            raise ValueError("Calibration table {} has a test with missing or invalid battery, test-id or buffer."
+                             .format(table))
+    return result
+
+
+def load_buffers(table: str) -> Tuple[Tuple[str, int, float], ...]:
+    """Reads buffers of the tests from the calibration table.
+
+       :param table: path to the calibration table
+       :return: sorted tuple of (battery, test_id, buffer), see utilities.get_buffer
+    """
+    return tuple(sorted((test["battery"], test["test-id"], test["buffer"]) for test in load_table(table)["tests"]))
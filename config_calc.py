@@ -1,49 +1,151 @@
 # SPDX-License-Identifier: MIT
-from batteries import nist_sts, dieharder, testu01
-import json
 import utilities
+import calculator
+import cache
+import registry
+import profiling
 from sys import argv, stderr, exit
 from os import stat
+from io import StringIO
+from itertools import chain
 import argparse
 
-# Constants used to differentiate TestU01 batteries.
-SMALL_CRUSH = 4
-CRUSH = 5
-
-
-def create_json(arguments, json_file, file_size: int):
-    configuration = {
-        "options": argv,
-        "data-size": file_size,
-        "randomness-testing-toolkit": {
-            "dieharder-settings": dieharder.dieharder(arguments, file_size),
-            "dieharder-defaults": dieharder.dieharder_defaults(arguments),
-
-            "nist-sts-settings": nist_sts.nist_sts_test(arguments, file_size),
-            "nist-sts-defaults": nist_sts.nist_sts_defaults(arguments),
-
-            "tu01-rabbit-settings": testu01.rabbit(arguments, file_size),
-            "tu01-rabbit-defaults": testu01.rabbit_defaults(arguments),
-
-            "tu01-smallcrush-settings": testu01.crush(arguments, SMALL_CRUSH, file_size),
-            "tu01-smallcrush-defaults": testu01.crush_defaults(arguments, SMALL_CRUSH),
-
-            "tu01-crush-settings": testu01.crush(arguments, CRUSH, file_size),
-            "tu01-crush-defaults": testu01.crush_defaults(arguments, CRUSH),
-
-            "tu01-alphabit-settings": testu01.alphabit(arguments, file_size),
-            "tu01-alphabit-defaults": testu01.alphabit_defaults(arguments),
-
-            "tu01-blockalphabit-settings": testu01.block_alphabit(arguments, file_size),
-            "tu01-blockalphabit-defaults": testu01.block_alphabit_defaults(arguments),
-        }
-    }
-    print(json.dumps(configuration, indent=4), file=json_file)
-
 
+def create_json(arguments, json_file, file_size: int, shard=None, prefix=()):
+    calculator.stream_configuration(json_file, file_size, calculator.options_from_arguments(arguments), shard,
+                                    argv, arguments.compact, not arguments.settings_only, prefix)
+    json_file.write("\n")
+
+
+def print_configuration(arguments, json_file, file_size: int, prefix=()):
+    """Prints configuration of all tests to the file. Unless disabled, the configuration
+       is taken from the cache.
+
+       :param arguments: parsed command line arguments
+       :param json_file: the file (stream) the configuration is printed to
+       :param file_size: size of the tested file in bytes
+       :param prefix: items (name, value) printed before the command line options, e.g. the batch input
+    """
+    if arguments.no_cache:
+        create_json(arguments, json_file, file_size, prefix=prefix)
+        return
+
+    options = calculator.options_from_arguments(arguments)
+    config_cache = cache.open_cache(arguments.cache_dir, arguments.cache_size)
+    key = cache.cache_key(options, file_size, arguments.compact, not arguments.settings_only)
+    with profiling.stage("cache-get"):
+        body = config_cache.get(key)
+    if body is None:
+        buffer = StringIO()
+        calculator.stream_configuration(buffer, file_size, options, compact=arguments.compact,
+                                        defaults=not arguments.settings_only)
+        body = buffer.getvalue()
+        with profiling.stage("cache-put"):
+            config_cache.put(key, body)
+    calculator.write_serialised(json_file, chain(prefix, [("options", argv)]), body, arguments.compact)
+    json_file.write("\n")
+
+
+def write_configuration(arguments, config_file: str, file_size: int):
+    """Writes configuration to the configuration file. When the tests are split into
+       shards, configuration of every shard is written to its own file. Unless disabled,
+       the configuration is taken from the cache.
+
+       :param arguments: parsed command line arguments
+       :param config_file: path to the configuration file
+       :param file_size: size of the tested file in bytes
+    """
+    if arguments.shards is None:
+        with open(config_file, "w") as json_file:
+            print_configuration(arguments, json_file, file_size)
+        return
+
+    import shards
+    options = calculator.options_from_arguments(arguments)
+    for shard in shards.create_shards(options, file_size, arguments.shards):
+        with open(shards.shard_path(config_file, shard.index), "w") as json_file:
+            create_json(arguments, json_file, file_size, shard)
+
+
+def write_defaults(arguments):
+    """Writes only the battery defaults to the configuration file. The defaults depend
+       only on the options, so they may be shared by all configurations created with the
+       --settings-only argument and the same options.
+
+       :param arguments: parsed command line arguments
+    """
+    with open(arguments.config_file, "w") as json_file:
+        calculator.write_items(json_file, calculator.defaults_items(calculator.options_from_arguments(arguments)),
+                               argv, arguments.compact)
+        json_file.write("\n")
+
+
+# The modules of the modes are imported only when the mode runs, like the batteries
+# (see registry.get), so the startup of the program stays short.
 def main(arguments) -> None:
+    if arguments.defaults_only:
+        write_defaults(arguments)
+        return
+
+    if arguments.calibrate is not None:
+        import calibration
+        try:
+            table = calibration.calibrate(arguments.calibrate, arguments.calibration, arguments.confidence,
+                                          arguments.tu01_bit_nb)
+        except (OSError, ValueError) as error:
+            print(error, file=stderr)
+            exit(-1)
+        for test in table["tests"]:
+            print("{} {}: buffer {} from {} samples".format(test["battery"], test["test-id"], test["buffer"],
+                                                           test["samples"]))
+        print("Calibration table version {} written to {}".format(table["version"], arguments.calibration))
+        return
+
+    if arguments.batch is not None:
+        import batch
+        batch.run(arguments)
+        return
+
+    if arguments.serve is not None:
+        import server
+        server.run(arguments)
+        return
+
+    if arguments.ladder is not None:
+        import ladder
+        try:
+            ladder.run(arguments)
+        except ValueError as error:
+            print(error, file=stderr)
+            exit(-1)
+        return
+
+    if arguments.watch is not None:
+        import watch
+        try:
+            watch.run(arguments)
+        except ValueError as error:
+            print(error, file=stderr)
+            exit(-1)
+        return
+
+    if arguments.target is not None:
+        import solver
+        try:
+            data_size = solver.smallest_size(arguments, solver.parse_targets(arguments.target))
+        except ValueError as error:
+            print(error, file=stderr)
+            exit(-1)
+        print(data_size)
+        if arguments.tune:
+            import tuning
+            arguments = tuning.tuned_arguments(arguments, data_size)
+        write_configuration(arguments, arguments.config_file, data_size)
+        return
+
     if arguments.data_file is not None:
-        data_size = stat(arguments.data_file).st_size
+        with profiling.stage("stat"):
+            data_size = stat(arguments.data_file).st_size
     else:
         parsed = utilities.parse_size(arguments.size)
         if parsed is None:
@@ -58,8 +160,49 @@ def main(arguments) -> None:
         print("The tested file is empty, please choose nonempty file", file=stderr)
         exit(-1)
 
-    with open(arguments.config_file, "w") as config_file:
-        create_json(arguments, config_file, data_size)
+    if arguments.verify is not None:
+        import verify
+        verify.run(arguments, data_size)
+        return
+
+    if arguments.report:
+        import report
+        report.run(arguments, data_size)
+        return
+
+    if arguments.advise:
+        import advisor
+        advisor.run(arguments, data_size)
+        return
+
+    if arguments.tune:
+        import tuning
+        tuned = tuning.tuned_arguments(arguments, data_size)
+        print("tu01-bit-nb: {} ({} bytes unused, {} with {})".format(
+            tuned.tu01_bit_nb, tuning.unused_bytes(data_size, tuned.tu01_bit_nb),
+            tuning.unused_bytes(data_size, arguments.tu01_bit_nb), arguments.tu01_bit_nb))
+        print("nist-stream-size: {} ({} bytes unused, {} with {})".format(
+            tuned.nist_stream_size, tuning.unused_bytes(data_size, tuned.nist_stream_size),
+            tuning.unused_bytes(data_size, arguments.nist_stream_size), arguments.nist_stream_size))
+        arguments = tuned
+
+    write_configuration(arguments, arguments.config_file, data_size)
+
+
+def serve_address(address: str) -> str:
+    """Checks the address of the --serve argument, either 'unix:PATH' or 'HOST:PORT'.
+
+       :param address: the address given on the command line
+       :return: the unchanged address
+    """
+    if address.startswith("unix:"):
+        if address == "unix:":
+            raise argparse.ArgumentTypeError("the path of the Unix domain socket is missing")
+        return address
+    _, separator, port = address.rpartition(":")
+    if not separator or not port.isdigit() or not 0 < int(port) < 65536:
+        raise argparse.ArgumentTypeError("invalid address {!r}, expected 'unix:PATH' or 'HOST:PORT'".format(address))
+    return address
 
 
 def parse_arguments() -> argparse.Namespace:
@@ -69,7 +212,7 @@ def parse_arguments() -> argparse.Namespace:
     )
 
     # Input size arguments - only one of them may be used
-    group = parser.add_mutually_exclusive_group(required=True)
+    group = parser.add_mutually_exclusive_group()
     group.add_argument("-f","--data-file",
                        type=str,
                        help="Path to file with data to be tested."
@@ -81,6 +224,99 @@ def parse_arguments() -> argparse.Namespace:
                             (K, M, G, T are accepted as powers of two)."
                        )
 
+    group.add_argument("-b","--batch",
+                       type=str,
+                       help="Creates configuration for every input of the batch. Either directory (all files \
+                            inside are used), glob pattern or manifest file with one data file path or size per line."
+                       )
+
+
+    group.add_argument("--serve",
+                       type=serve_address,
+                       help="Runs service answering configuration requests over HTTP. The address is either \
+                            'unix:PATH' for Unix domain socket or 'HOST:PORT'. Configuration is requested by \
+                            'GET /config?size=SIZE', other options have the same names as the arguments."
+                       )
+
+
+    group.add_argument("--defaults-only",
+                       action="store_true",
+                       default=False,
+                       help="Writes only the battery defaults, which do not depend on the data size, to the \
+                            configuration file. They complement configurations created with --settings-only."
+                       )
+
+
+    group.add_argument("--calibrate",
+                       type=str,
+                       help="Fits buffers of variable size tests to consumption samples read from the given logs \
+                            (comma separated paths or glob patterns) and writes them as a new version of the \
+                            --calibration table."
+                       )
+
+
+    group.add_argument("--ladder",
+                       type=str,
+                       help="Writes battery settings for a range of data sizes, e.g. '1M..1T', to the configuration \
+                            file. Consecutive sizes with the same settings are collapsed into one size interval."
+                       )
+
+
+    group.add_argument("-w","--watch",
+                       type=str,
+                       help="Watches growing data files and rewrites their configurations only when psamples \
+                            (repetitions) of some test change. Either path to a data file, directory or glob pattern, \
+                            configurations of a directory or pattern are written to the output directory."
+                       )
+
+
+    parser.add_argument("--watch-interval",
+                        type=float,
+                        default=10,
+                        help="Number of seconds between two checks of the watched files. Default value is 10."
+                        )
+
+
+    parser.add_argument("--ladder-step",
+                        type=str,
+                        default="x2",
+                        help="Step of the --ladder sizes, either 'xFACTOR' (geometric, e.g. 'x1.5') or '+SIZE' \
+                              (linear, e.g. '+64M'). Default value is 'x2'."
+                        )
+
+
+    parser.add_argument("-t","--target",
+                        type=str,
+                        help="Finds the smallest data size reaching the target coverage, given as comma separated \
+                              BATTERY[:TEST-ID[:VARIANT]]=COUNT items, e.g. 'tu01-crush=2,dieharder:200=1'. The size \
+                              is printed and its configuration is written to the configuration file."
+                        )
+
+
+    parser.add_argument("--verify",
+                        type=str,
+                        default=None,
+                        help="Path to configuration file which is verified against the data size given by \
+                              -f/--data-file or -s/--size instead of creating a configuration. Consumed bytes \
+                              of every test are printed, exit status is nonzero when some test rewinds the data."
+                        )
+
+
+    parser.add_argument("--report",
+                        action="store_true",
+                        default=False,
+                        help="Prints the data utilisation of every test and battery (consumed bytes, bytes left \
+                              unused and percentage of the data used) instead of writing the configuration."
+                        )
+
+
+    parser.add_argument("--advise",
+                        action="store_true",
+                        default=False,
+                        help="Prints extra bytes needed for one more psample (repetition) of every test and the \
+                              cheapest increments of the data size instead of writing the configuration."
+                        )
+
 
     # Remaining arguments
     parser.add_argument("-c","--config-file",
@@ -90,6 +326,29 @@ def parse_arguments() -> argparse.Namespace:
                         )
 
 
+    parser.add_argument("-o","--output-dir",
+                        type=str,
+                        default="configs",
+                        help="Directory the configurations of the batch mode will be written to. Default value is \
+                              'configs'."
+                        )
+
+
+    parser.add_argument("-j","--jobs",
+                        type=int,
+                        default=None,
+                        help="Number of worker processes used in the batch mode. Defaults to the number of CPUs."
+                        )
+
+
+    parser.add_argument("--stat-threads",
+                        type=int,
+                        default=16,
+                        help="Number of threads reading sizes of the data files in the batch mode, the configurations \
+                              are computed meanwhile. Higher values help on network storage. Default value is 16."
+                        )
+
+
     parser.add_argument("-i","--increased",
                         action="store_true",
                         default=False,
@@ -124,6 +383,21 @@ def parse_arguments() -> argparse.Namespace:
                         )
 
 
+    parser.add_argument("--calibration",
+                        type=str,
+                        default=None,
+                        help="Calibration table with buffers of variable size tests, created by --calibrate. The \
+                              buffers replace --dieharder-buffer and --tu01-buffer for the calibrated tests."
+                        )
+
+
+    parser.add_argument("--confidence",
+                        type=float,
+                        default=0.999,
+                        help="Confidence level of the buffers fitted by --calibrate. Default value is 0.999."
+                        )
+
+
     parser.add_argument("--tu01-bit-nb",
                         type=int,
                         default=52428800,
@@ -132,10 +406,187 @@ def parse_arguments() -> argparse.Namespace:
                         )
 
 
+    parser.add_argument("--batteries",
+                        type=str,
+                        default=None,
+                        help="Comma separated list of batteries the configuration is created for, e.g. \
+                              'dieharder,tu01-crush'. Other batteries are neither computed nor written. All \
+                              batteries are used by default."
+                        )
+
+
+    parser.add_argument("--time-budget",
+                        type=str,
+                        default=None,
+                        help="Lowers psamples (repetitions) and omits the most expensive tests, so the estimated \
+                              CPU time of all tests fits the budget. Either number of seconds, or number followed \
+                              by a unit (s, m, h, d)."
+                        )
 
-    return parser.parse_args()
+
+    parser.add_argument("--shards",
+                        type=int,
+                        default=None,
+                        help="Splits the tests into the given number of configurations with balanced estimated \
+                              CPU time. Configuration of each shard is written to its own file, e.g. config-1.json."
+                        )
+
+
+    parser.add_argument("--compact",
+                        action="store_true",
+                        default=False,
+                        help="Writes the configuration without indentation and whitespace, it is still accepted by RTT."
+                        )
+
+
+    parser.add_argument("--settings-only",
+                        action="store_true",
+                        default=False,
+                        help="Writes only the battery settings, the defaults are left out. The defaults for the same \
+                              options may be written once by --defaults-only."
+                        )
+
+
+    parser.add_argument("--ndjson",
+                        type=str,
+                        default=None,
+                        help="Writes configurations of the batch mode into the given file, one compact configuration \
+                              with the name of its input per line (NDJSON), instead of the output directory."
+                        )
+
+
+    parser.add_argument("--no-cache",
+                        action="store_true",
+                        default=False,
+                        help="The configuration is always computed, the cache of configurations is not used."
+                        )
+
+
+    parser.add_argument("--cache-dir",
+                        type=str,
+                        default=cache.default_directory(),
+                        help="Directory of the cache of configurations. Default value is \
+                              '~/.cache/rtt-config-calc'."
+                        )
+
+
+    parser.add_argument("--cache-size",
+                        type=str,
+                        default="1G",
+                        help="Maximal size of the cache of configurations, in the same format as --size. Default \
+                              value is 1G. The least recently used configurations are removed first."
+                        )
+
+
+    parser.add_argument("--memory-cache",
+                        type=int,
+                        default=1024,
+                        help="Number of configurations kept in memory by the service. Default value is 1024."
+                        )
+
+
+    parser.add_argument("--tune",
+                        action="store_true",
+                        default=False,
+                        help="Chooses the bit_nb argument and NIST stream size for the data size, so the least \
+                              data is left unused. Replaces values of --tu01-bit-nb and --nist-stream-size."
+                        )
+
+
+    parser.add_argument("--tune-min-bit-nb",
+                        type=int,
+                        default=None,
+                        help="The lowest bit_nb argument chosen by --tune. Default value is the lowest value for \
+                              which no Rabbit test is omitted (52,428,800)."
+                        )
+
+
+    parser.add_argument("--profile",
+                        type=str,
+                        nargs="?",
+                        const="text",
+                        choices=["text", "json"],
+                        default=None,
+                        help="Prints durations of the stages of the calculation (data size, settings and defaults \
+                              of every battery, serialisation, cache...) to the standard error output, either as \
+                              text table (default) or JSON. In the batch mode, the stages of all inputs are \
+                              summed and their median (p50) and 99th percentile (p99) are given."
+                        )
+
+
+
+    arguments = parser.parse_args()
+    has_input = arguments.data_file is not None or arguments.size is not None or arguments.batch is not None \
+        or arguments.serve is not None or arguments.ladder is not None or arguments.defaults_only \
+        or arguments.calibrate is not None
+    # The target coverage tells the watch mode when the data is big enough.
+    if arguments.watch is None and has_input == (arguments.target is not None):
+        parser.error("exactly one of the arguments -f/--data-file -s/--size -b/--batch --serve --defaults-only "
+                     "--calibrate --ladder -w/--watch -t/--target is required")
+    arguments.buffers = None
+    if arguments.calibrate is not None:
+        if arguments.calibration is None:
+            parser.error("argument --calibrate: requires --calibration")
+        if not 0.5 <= arguments.confidence < 1:
+            parser.error("argument --confidence: must be at least 0.5 and lower than 1")
+    elif arguments.calibration is not None:
+        import calibration
+        try:
+            arguments.buffers = calibration.load_buffers(arguments.calibration)
+        except (OSError, ValueError) as error:
+            parser.error("argument --calibration: {}".format(error))
+    if arguments.watch is not None and (arguments.time_budget is not None or arguments.shards is not None
+                                        or arguments.tune):
+        parser.error("argument -w/--watch: not allowed with --time-budget, --shards or --tune")
+    # The budget would lower the psamples (repetitions) below the target coverage.
+    if arguments.target is not None and arguments.time_budget is not None:
+        parser.error("argument -t/--target: not allowed with --time-budget")
+    if arguments.ladder is not None and (arguments.time_budget is not None or arguments.shards is not None):
+        parser.error("argument --ladder: not allowed with --time-budget or --shards")
+    if arguments.ndjson is not None and (arguments.batch is None or arguments.shards is not None):
+        parser.error("argument --ndjson: requires -b/--batch and is not allowed with --shards")
+    if arguments.verify is not None and arguments.data_file is None and arguments.size is None:
+        parser.error("argument --verify: requires -f/--data-file or -s/--size")
+    if arguments.report and arguments.data_file is None and arguments.size is None:
+        parser.error("argument --report: requires -f/--data-file or -s/--size")
+    if arguments.advise and arguments.data_file is None and arguments.size is None:
+        parser.error("argument --advise: requires -f/--data-file or -s/--size")
+    arguments.cache_size = utilities.parse_size(arguments.cache_size)
+    if arguments.cache_size is None:
+        parser.error("argument --cache-size: invalid size")
+    if arguments.stat_threads < 1:
+        parser.error("argument --stat-threads: the number of threads must be positive")
+    if arguments.shards is not None and arguments.shards < 1:
+        parser.error("argument --shards: the number of shards must be positive")
+    if arguments.batteries is not None:
+        try:
+            arguments.batteries = registry.parse_batteries(arguments.batteries)
+        except ValueError as error:
+            parser.error("argument --batteries: {}".format(error))
+    if arguments.time_budget is not None:
+        arguments.time_budget = utilities.parse_duration(arguments.time_budget)
+        if arguments.time_budget is None:
+            parser.error("argument --time-budget: invalid duration")
+    return arguments
+
+
+def run_profiled(arguments) -> None:
+    """Runs the program with the profiling of the stages enabled and prints their counters,
+       see profiling.counters. The counters are printed also when the program fails.
+
+       :param arguments: parsed command line arguments
+    """
+    profiling.enable()
+    try:
+        with profiling.stage("total"):
+            main(arguments)
+    finally:
+        print(profiling.format_counters(profiling.counters(), arguments.profile), file=stderr)
 
 
 if __name__ == "__main__":
     prog_args = parse_arguments()
-    main(prog_args)
+    if prog_args.profile is not None:
+        run_profiled(prog_args)
+    else:
+        main(prog_args)
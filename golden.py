@@ -0,0 +1,526 @@
+# SPDX-License-Identifier: MIT
+from typing import Callable, Dict, List, Optional, Tuple
+from multiprocessing import Pool
+from hashlib import sha256
+from random import Random
+from sys import stderr, exit
+from io import StringIO
+from tempfile import TemporaryDirectory
+import argparse
+import importlib
+import gzip
+import json
+import sys
+import os
+import calculator
+import breakpoints
+import cache
+import registry
+import verify
+import sweep
+import server
+
+# Version of the format of the golden tables.
+FORMAT_VERSION = 1
+
+# Option sets of the golden table, random combinations may be added by --random-options.
+OPTION_SETS = [
+    ("default", {}),
+    ("increased", {"increased": True}),
+    ("bit-nb-1000000", {"tu01_bit_nb": 1000000}),
+    ("bit-nb-3000", {"tu01_bit_nb": 3000}),
+    ("bit-nb-400", {"tu01_bit_nb": 400}),
+    ("stream-size-50000000", {"nist_stream_size": 50000000}),
+    ("buffers", {"dieharder_buffer": 0.01, "tu01_buffer": 0.05}),
+    ("calibrated", {"buffers": (("dieharder", 13, 0.02), ("tu01-crush", 27, 0.03), ("tu01-rabbit", 20, 0.5))}),
+]
+
+# Batteries of the baseline in the order of the configuration file, the TestU01 batteries of
+# the baseline take the battery constant of Crush and SmallCrush (4 and 5) as an argument.
+BASELINE_BATTERIES = ["dieharder", "nist-sts", "tu01-rabbit", "tu01-smallcrush", "tu01-crush",
+                      "tu01-alphabit", "tu01-blockalphabit"]
+
+# Engines compared with the golden table. The reference engine are the battery functions themselves.
+ENGINES = ["reference", "steps", "intervals", "sweep-python", "sweep-numpy", "stream", "server", "index", "cache"]
+
+# Largest data size of the random sizes.
+MAX_SIZE = 1 << 44
+
+# Largest data size the vectorised sweep multiplies by the scale 8 without int64 overflow,
+# the sizes around it check both paths of sweep.counts_numpy.
+INT64_BOUNDARY = ((1 << 63) - 1) // 8
+
+# Prepared by the worker initializer, so the table is not pickled for every task.
+_worker_table = None
+
+# Settings functions of the baseline batteries, loaded once by every worker of generate.
+_baseline = None
+
+
+def option_sets(count: int, seed: int) -> List[Tuple[str, calculator.Options]]:
+    """Returns the option sets of the golden table - the fixed ones and count random combinations.
+
+       :param count: number of random combinations
+       :param seed: seed of the random combinations
+       :return: list of tuples (name, options)
+    """
+    result = [(name, calculator.Options()._replace(**changes)) for name, changes in OPTION_SETS]
+    generator = Random(seed)
+    for index in range(count):
+        options = calculator.Options(increased=generator.random() < 0.5,
+                                     dieharder_buffer=generator.choice([0.0, 0.001, 0.05]),
+                                     nist_stream_size=generator.choice([1000, 1000000, 8388608]),
+                                     tu01_buffer=generator.choice([0.0, 0.01, 0.2]),
+                                     tu01_bit_nb=generator.choice([500, 4096, 52428800, 100000000]))
+        result.append(("random-{}".format(index), options))
+    return result
+
+
+def baseline_sets(sets: List[Tuple[str, calculator.Options]]) -> List[Tuple[str, calculator.Options]]:
+    """Returns the option sets the baseline can compute. The baseline has no calibrated buffers,
+       so such sets are dropped. Rabbit test 20 with non-default bit_nb was fixed after the
+       baseline (the bytes of its repetition were computed from the bits), so the Rabbit battery
+       is left out of the sets with non-default bit_nb.
+
+       :param sets: option sets, see option_sets
+       :return: list of tuples (name, options)
+    """
+    result = []
+    for name, options in sets:
+        if options.buffers is not None:
+            continue
+        if options.tu01_bit_nb != calculator.Options().tu01_bit_nb:
+            options = options._replace(batteries=tuple(battery for battery in registry.BATTERIES
+                                                       if battery != "tu01-rabbit"))
+        result.append((name, options))
+    return result
+
+
+def load_baseline(directory: str) -> Dict[str, Callable[[calculator.Options, int], dict]]:
+    """Imports the battery modules of the baseline checkout (e.g. created by git worktree) under
+       their own names and restores the modules of this tree afterwards.
+
+       :param directory: root directory of the baseline checkout
+       :return: dictionary battery name -> settings function (options, file size)
+    """
+    shadowed = {name: module for name, module in sys.modules.items()
+                if name in {"utilities", "batteries"} or name.startswith("batteries.")}
+    for name in shadowed:
+        del sys.modules[name]
+    sys.path.insert(0, os.path.abspath(directory))
+    try:
+        dieharder = importlib.import_module("batteries.dieharder")
+        nist_sts = importlib.import_module("batteries.nist_sts")
+        testu01 = importlib.import_module("batteries.testu01")
+    finally:
+        sys.path.remove(os.path.abspath(directory))
+        for name in [name for name in sys.modules if name in {"utilities", "batteries"}
+                     or name.startswith("batteries.")]:
+            del sys.modules[name]
+        sys.modules.update(shadowed)
+    return {
+        "dieharder": dieharder.dieharder,
+        "nist-sts": nist_sts.nist_sts_test,
+        "tu01-rabbit": testu01.rabbit,
+        "tu01-smallcrush": lambda options, file_size: testu01.crush(options, 4, file_size),
+        "tu01-crush": lambda options, file_size: testu01.crush(options, 5, file_size),
+        "tu01-alphabit": testu01.alphabit,
+        "tu01-blockalphabit": testu01.block_alphabit,
+    }
+
+
+def golden_sizes(dense: int, count: int, seed: int) -> List[int]:
+    """Returns sorted data sizes of the golden table - all sizes up to dense, sizes around
+       powers of two and their multiples by 3, 5 and 10, and count random sizes spread
+       geometrically up to MAX_SIZE. The sizes around INT64_BOUNDARY are added as well.
+
+       :param dense: highest size of the dense interval
+       :param count: number of random sizes
+       :param seed: seed of the random sizes
+       :return: sorted list of distinct sizes
+    """
+    sizes = set(range(1, dense + 1))
+    for power in range(45):
+        for base in [1 << power, 3 << power, 5 << power, 10 << power]:
+            sizes.update(size for size in [base - 1, base, base + 1] if 0 < size <= MAX_SIZE)
+    sizes.update([INT64_BOUNDARY - 1, INT64_BOUNDARY, INT64_BOUNDARY + 1])
+    generator = Random(seed)
+    while len(sizes) < dense + count + 3:
+        sizes.add(int(2 ** generator.uniform(0, 44)))
+    return sorted(sizes)
+
+
+def encode_options(options: calculator.Options):
+    return options._asdict()
+
+
+def decode_options(encoded) -> calculator.Options:
+    options = calculator.Options(**encoded)
+    if options.batteries is not None:
+        options = options._replace(batteries=tuple(options.batteries))
+    if options.buffers is not None:
+        options = options._replace(buffers=tuple(tuple(buffer) for buffer in options.buffers))
+    return options
+
+
+def settings_digest(sections) -> str:
+    """Returns short digest of the battery settings (name -> settings), the key order is ignored."""
+    return sha256(json.dumps(sections, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def reference_settings(options: calculator.Options, file_size: int) -> Dict[str, dict]:
+    """Returns settings of the chosen batteries computed directly by the battery functions."""
+    return {battery.name + "-settings": battery.settings(options, file_size, None)
+            for battery in registry.selected(options)}
+
+
+def row_counts(rows: List[Tuple[str, Optional[int], Optional[int]]], sections) -> List[int]:
+    """Returns psamples (repetitions, streams) of the rows (battery, test_id, variant) read from the
+       battery settings. Tests which are not executed have count 0, the Rabbit row with test_id
+       None holds the default repetitions.
+
+       :param rows: the rows, see breakpoints.all_steps
+       :param sections: settings of the batteries (name -> settings)
+       :return: list of counts
+    """
+    counts = {}
+    for battery, key, default, _ in verify.BATTERIES:
+        settings = sections.get(battery + "-settings")
+        if settings is None:
+            continue
+        counts[(battery, None, None)] = int(settings.get("defaults", {}).get(key, default))
+        for test_id, variant, count in verify.test_counts(settings, key, default):
+            counts[(battery, test_id, variant)] = count
+    return [counts.get(row, 0) for row in rows]
+
+
+def baseline_settings(options: calculator.Options, file_size: int) -> Dict[str, dict]:
+    """Returns settings of the chosen batteries computed by the battery functions of the baseline,
+       see load_baseline."""
+    return {name + "-settings": _baseline[name](options, file_size)
+            for name in BASELINE_BATTERIES if options.batteries is None or name in options.batteries}
+
+
+def _init_generator(directory: str) -> None:
+    global _baseline
+    _baseline = load_baseline(directory)
+
+
+def generate_entry(task) -> dict:
+    """Computes one entry (option set) of the golden table by the battery functions of the baseline.
+
+       :param task: tuple (name, options, sizes)
+       :return: the entry in dictionary form
+    """
+    name, options, sizes = task
+    rows = [(step.battery, step.test_id, step.variant) for step in breakpoints.all_steps(options)]
+    digests = []
+    counts = []
+    for size in sizes:
+        sections = baseline_settings(options, size)
+        digests.append(settings_digest(sections))
+        counts.append(row_counts(rows, sections))
+    return {"name": name, "options": encode_options(options), "rows": rows, "sizes": sizes,
+            "digests": digests, "counts": counts}
+
+
+def generate(path: str, baseline: str, sets: List[Tuple[str, calculator.Options]], sizes: List[int],
+             jobs: int) -> dict:
+    """Generates the golden table by the battery functions of the baseline and writes it
+       compressed to the file. The table is frozen, the engines of this tree (the reference
+       engine too) are compared with it.
+
+       :param path: path to the golden table, gzip compressed JSON
+       :param baseline: root directory of the baseline checkout, see load_baseline
+       :param sets: option sets the baseline can compute, see baseline_sets
+       :param sizes: data sizes, see golden_sizes
+       :param jobs: number of worker processes
+       :return: the golden table
+    """
+    tasks = [(name, options, sizes) for name, options in sets]
+    with Pool(jobs, initializer=_init_generator, initargs=(baseline,)) as pool:
+        entries = pool.map(generate_entry, tasks)
+    table = {"version": FORMAT_VERSION, "entries": entries}
+    with gzip.open(path, "wt") as table_file:
+        json.dump(table, table_file, separators=(",", ":"))
+    return table
+
+
+def load_table(path: str) -> dict:
+    """Reads the golden table written by generate."""
+    with gzip.open(path, "rt") as table_file:
+        table = json.load(table_file)
+    if table.get("version") != FORMAT_VERSION:
+        raise ValueError("Unsupported version of the golden table {}.".format(path))
+    for entry in table["entries"]:
+        entry["rows"] = [tuple(row) for row in entry["rows"]]
+    return table
+
+
+def _parsed_settings(serialised: str) -> Dict[str, dict]:
+    toolkit = json.loads(serialised)["randomness-testing-toolkit"]
+    return {name: section for name, section in toolkit.items() if name.endswith("-settings")}
+
+
+def engine_digests(engine: str, options: calculator.Options, sizes: List[int]) -> List[str]:
+    """Returns digests of the battery settings computed by the engine, see settings_digest.
+       The intervals engine checks that the configuration is equal at both ends of the
+       interval of every size, see breakpoints.interval. The index engine looks the sizes up
+       in random order, so most of them are found in intervals known from other sizes. The
+       cache engine stores every configuration in an empty cache and reads it back.
+
+       :param engine: one of reference, intervals, stream, server, index, cache
+       :param options: options of the calculation
+       :param sizes: data sizes in bytes
+       :return: list of digests, one per size
+    """
+    if engine == "reference":
+        return [settings_digest(reference_settings(options, size)) for size in sizes]
+    if engine == "intervals":
+        steps = breakpoints.all_steps(options)
+        digests = []
+        for size in sizes:
+            start, end = breakpoints.interval(steps, size)
+            ends = {settings_digest(reference_settings(options, start)),
+                    settings_digest(reference_settings(options, end - 1))}
+            digests.append(ends.pop() if len(ends) == 1 else "start != end")
+        return digests
+    if engine == "stream":
+        digests = []
+        for size in sizes:
+            buffer = StringIO()
+            calculator.stream_configuration(buffer, size, options, compact=True, defaults=False)
+            digests.append(settings_digest(_parsed_settings(buffer.getvalue())))
+        return digests
+    if engine == "server":
+        config_server = server.ConfigServer(options, 64)
+        return [settings_digest(_parsed_settings(config_server.configuration(size, options).decode()))
+                for size in sizes]
+    if engine == "index":
+        index = breakpoints.ConfigIndex(options, len(sizes))
+        shuffled = list(sizes)
+        Random(0).shuffle(shuffled)
+        digests = {}
+        for size in shuffled:
+            toolkit = index.lookup(size)["randomness-testing-toolkit"]
+            digests[size] = settings_digest({name: section for name, section in toolkit.items()
+                                             if name.endswith("-settings")})
+        return [digests[size] for size in sizes]
+    if engine == "cache":
+        digests = []
+        with TemporaryDirectory() as directory:
+            config_cache = cache.ConfigCache(directory, 1 << 40)
+            for size in sizes:
+                key = cache.cache_key(options, size, True, False)
+                buffer = StringIO()
+                calculator.stream_configuration(buffer, size, options, compact=True, defaults=False)
+                config_cache.put(key, buffer.getvalue())
+                body = config_cache.get(key)
+                if body is None:
+                    digests.append("not cached")
+                    continue
+                buffer = StringIO()
+                calculator.write_serialised(buffer, [("options", ["golden.py"])], body, True)
+                digests.append(settings_digest(_parsed_settings(buffer.getvalue())))
+        return digests
+    raise ValueError("Unknown engine {}.".format(engine))
+
+
+def engine_counts(engine: str, options: calculator.Options, sizes: List[int]) -> List[List[int]]:
+    """Returns psamples (repetitions, streams) of the rows computed by the engine.
+
+       :param engine: one of steps, sweep-python, sweep-numpy
+       :param options: options of the calculation
+       :param sizes: data sizes in bytes
+       :return: matrix of counts, one row per size
+    """
+    if engine == "steps":
+        steps = breakpoints.all_steps(options)
+        return [[step.count(size) for step in steps] for size in sizes]
+    _, counts = sweep.sweep(options, sizes, engine[len("sweep-"):])
+    return [[int(count) for count in column] for column in zip(*counts)]
+
+
+def _init_worker(table) -> None:
+    global _worker_table
+    _worker_table = table
+
+
+def check_entry(task) -> Tuple[str, str, int, List[str]]:
+    """Checks one entry (option set) of the golden table against the engine. An exception
+       raised by the engine is reported as a mismatch of the entry.
+
+       :param task: tuple (engine, index of the entry)
+       :return: tuple (engine, name of the entry, number of checked sizes, list of mismatches)
+    """
+    engine, index = task
+    entry = _worker_table["entries"][index]
+    options = decode_options(entry["options"])
+    sizes = entry["sizes"]
+    try:
+        mismatches = _entry_mismatches(engine, entry, options, sizes)
+    except Exception as error:
+        mismatches = ["{}: {}".format(type(error).__name__, error)]
+    return engine, entry["name"], len(sizes), mismatches
+
+
+def _entry_mismatches(engine: str, entry: dict, options: calculator.Options, sizes: List[int]) -> List[str]:
+    mismatches = []
+    if engine in {"steps", "sweep-python", "sweep-numpy"}:
+        rows = [(step.battery, step.test_id, step.variant) for step in breakpoints.all_steps(options)]
+        if rows != entry["rows"]:
+            return ["the tests differ from the golden table"]
+        for size, expected, counts in zip(sizes, entry["counts"], engine_counts(engine, options, sizes)):
+            for row, expected_count, count in zip(rows, expected, counts):
+                if expected_count != count:
+                    mismatches.append("size {} test {}: {} instead of {}".format(
+                        size, ":".join(str(part) for part in row if part is not None), count, expected_count))
+    else:
+        for size, expected, digest in zip(sizes, entry["digests"], engine_digests(engine, options, sizes)):
+            if expected != digest:
+                mismatches.append("size {}: settings differ".format(size))
+    return mismatches
+
+
+def check(table: dict, engines: List[str], jobs: int, output=stderr, shown: int = 10) -> int:
+    """Checks the engines against the golden table, every engine and option set is checked
+       by its own task.
+
+       :param table: the golden table, see load_table
+       :param engines: names of the checked engines, see ENGINES
+       :param jobs: number of worker processes
+       :param output: the file the mismatches are printed to
+       :param shown: highest number of printed mismatches of one task
+       :return: number of mismatches
+    """
+    tasks = [(engine, index) for engine in engines for index in range(len(table["entries"]))]
+    total = 0
+    with Pool(jobs, initializer=_init_worker, initargs=(table,)) as pool:
+        for engine, name, checked, mismatches in pool.imap_unordered(check_entry, tasks):
+            total += len(mismatches)
+            print("{} {}: {} sizes, {} mismatches".format(engine, name, checked, len(mismatches)), file=output)
+            for mismatch in mismatches[:shown]:
+                print("    " + mismatch, file=output)
+    return total
+
+
+def parse_arguments() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="RTT Configuration calculator golden table.",
+        description="Generates the golden table of the configurations by the reference implementation \
+                     and checks the other engines against it."
+    )
+
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--generate",
+                       action="store_true",
+                       help="Generates the golden table by the battery functions of the baseline given by \
+                            --baseline."
+                       )
+
+    group.add_argument("--check",
+                       action="store_true",
+                       help="Checks the engines against the golden table."
+                       )
+
+
+    parser.add_argument("-g", "--golden",
+                        type=str,
+                        default="golden.json.gz",
+                        help="Path to the golden table (gzip compressed JSON). Default value is 'golden.json.gz'."
+                        )
+
+
+    parser.add_argument("--baseline",
+                        type=str,
+                        help="Root directory of the baseline checkout used by --generate, e.g. created by \
+                              'git worktree add ../baseline f54a837'."
+                        )
+
+
+    parser.add_argument("--engines",
+                        type=str,
+                        default=",".join(ENGINES),
+                        help="Comma separated list of the checked engines. Default value is all engines: {}. \
+                              The sweep-numpy engine is skipped when NumPy is not installed."
+                             .format(", ".join(ENGINES))
+                        )
+
+
+    parser.add_argument("--dense",
+                        type=int,
+                        default=2048,
+                        help="All data sizes up to this value are included in the golden table. Default value \
+                              is 2048."
+                        )
+
+
+    parser.add_argument("--random-sizes",
+                        type=int,
+                        default=1000,
+                        help="Number of random data sizes in the golden table. Default value is 1000."
+                        )
+
+
+    parser.add_argument("--random-options",
+                        type=int,
+                        default=8,
+                        help="Number of random combinations of the options in the golden table. Default value \
+                              is 8."
+                        )
+
+
+    parser.add_argument("--seed",
+                        type=int,
+                        default=0,
+                        help="Seed of the random data sizes and options. Default value is 0."
+                        )
+
+
+    parser.add_argument("-j", "--jobs",
+                        type=int,
+                        help="Number of worker processes. Default value is the number of CPUs."
+                        )
+
+    arguments = parser.parse_args()
+    arguments.engines = [engine.strip() for engine in arguments.engines.split(",")]
+    unknown = [engine for engine in arguments.engines if engine not in ENGINES]
+    if len(unknown) > 0:
+        parser.error("argument --engines: unknown engines {}".format(", ".join(unknown)))
+    if arguments.jobs is not None and arguments.jobs < 1:
+        parser.error("argument -j/--jobs: the number of jobs must be positive")
+    if arguments.generate and arguments.baseline is None:
+        parser.error("argument --generate: requires --baseline")
+    if arguments.baseline is not None and not os.path.isdir(os.path.join(arguments.baseline, "batteries")):
+        parser.error("argument --baseline: {} has no batteries directory".format(arguments.baseline))
+    return arguments
+
+
+def main(arguments) -> None:
+    jobs = arguments.jobs if arguments.jobs is not None else os.cpu_count()
+    if arguments.generate:
+        sets = baseline_sets(option_sets(arguments.random_options, arguments.seed))
+        sizes = golden_sizes(arguments.dense, arguments.random_sizes, arguments.seed)
+        generate(arguments.golden, arguments.baseline, sets, sizes, jobs)
+        print("Golden table of {} option sets and {} sizes written to {}".format(len(sets), len(sizes),
+                                                                                 arguments.golden))
+        return
+
+    try:
+        table = load_table(arguments.golden)
+    except (OSError, ValueError) as error:
+        print(error, file=stderr)
+        exit(-1)
+    engines = arguments.engines
+    if "sweep-numpy" in engines and sweep.numpy is None:
+        print("NumPy is not installed, the sweep-numpy engine is skipped.", file=stderr)
+        engines = [engine for engine in engines if engine != "sweep-numpy"]
+    mismatches = check(table, engines, jobs)
+    if mismatches > 0:
+        print("{} mismatches with the golden table.".format(mismatches), file=stderr)
+        exit(-1)
+    print("All engines match the golden table.")
+
+
+if __name__ == "__main__":
+    main(parse_arguments())
@@ -0,0 +1,105 @@
+# SPDX-License-Identifier: MIT
+from typing import List, Tuple
+from sys import argv
+import calculator
+import breakpoints
+import utilities
+
+
+def parse_range(spec: str) -> Tuple[int, int]:
+    """Parses the range of data sizes, e.g. '1M..1T'. Both bounds are included
+       and have the same format as the --size argument.
+
+       :param spec: the range as given by the --ladder argument
+       :return: tuple (lowest size, highest size)
+    """
+    low, separator, high = spec.partition("..")
+    low, high = utilities.parse_size(low), utilities.parse_size(high)
+    if separator == "" or low is None or high is None or low == 0 or low > high:
+        raise ValueError("Invalid range of data sizes '{}'.".format(spec))
+    return low, high
+
+
+def ladder_sizes(low: int, high: int, step: str) -> List[int]:
+    """Returns the data sizes of the ladder. The step is either 'xFACTOR' for
+       geometric ladder (e.g. 'x2' or 'x1.5') or '+SIZE' for linear ladder
+       (e.g. '+64M', the size has the same format as the --size argument).
+
+       :param low: the lowest size
+       :param high: the highest size
+       :param step: the step as given by the --ladder-step argument
+       :return: sorted list of data sizes
+    """
+    sizes = []
+    if step.startswith("x"):
+        try:
+            factor = float(step[1:])
+        except ValueError:
+            factor = 0
+        if factor <= 1:
+            raise ValueError("Invalid step '{}', the factor must be greater than 1.".format(step))
+        size = low
+        while size <= high:
+            sizes.append(size)
+            size = max(size + 1, int(size * factor))
+    elif step.startswith("+"):
+        increment = utilities.parse_size(step[1:])
+        if increment is None or increment == 0:
+            raise ValueError("Invalid step '{}'.".format(step))
+        sizes = list(range(low, high + 1, increment))
+    else:
+        raise ValueError("Invalid step '{}', use either xFACTOR or +SIZE.".format(step))
+    return sizes
+
+
+def ladder(options, sizes: List[int]):
+    """Creates battery settings for the sizes of the ladder. Consecutive sizes with the same
+       settings share one entry, which covers the whole interval of data sizes with these
+       settings. The intervals are computed from the breakpoints of the tests, so the settings
+       are computed only once per interval.
+
+       :param options: options of the calculation (or parsed command line arguments)
+       :param sizes: sorted data sizes of the ladder
+       :return: list of entries in dictionary form
+    """
+    steps = breakpoints.all_steps(options)
+    entries = []
+    end = None
+    for size in sizes:
+        if end is not None and size < end:
+            entries[-1]["ladder-sizes"].append(size)
+            continue
+        start, end = breakpoints.interval(steps, size)
+        settings = dict(calculator.battery_sections(options, size, defaults=False))
+        previous = entries[-1] if len(entries) > 0 else None
+        # Neighbouring intervals may differ only in tests which are not executed.
+        if previous is not None and previous["data-size"]["last"] + 1 == start \
+                and previous["randomness-testing-toolkit"] == settings:
+            previous["data-size"]["last"] = end - 1
+            previous["ladder-sizes"].append(size)
+            continue
+        entries.append({
+            "data-size": {"first": start, "last": end - 1},
+            "ladder-sizes": [size],
+            "randomness-testing-toolkit": settings
+        })
+    return entries
+
+
+def run(arguments) -> None:
+    """Runs the ladder mode - writes battery settings for all data sizes of the range
+       given by the --ladder argument to the configuration file. The battery defaults,
+       which do not depend on the data size, are written only once (and not at all
+       with the --settings-only argument).
+
+       :param arguments: parsed command line arguments
+    """
+    low, high = parse_range(arguments.ladder)
+    options = calculator.options_from_arguments(arguments)
+    table = {}
+    if not arguments.settings_only:
+        _, sections = next(calculator.defaults_items(options))
+        table["battery-defaults"] = dict(sections)
+    table["entries"] = ladder(options, ladder_sizes(low, high, arguments.ladder_step))
+    with open(arguments.config_file, "w") as json_file:
+        print(calculator.serialise(table, argv, arguments.compact), file=json_file)
@@ -0,0 +1,130 @@
+# SPDX-License-Identifier: MIT
+from typing import Dict, List, Optional
+from time import perf_counter
+from math import ceil
+import json
+import accounting
+
+# Durations (in seconds) of the stages recorded since enable(), None when profiling is disabled.
+_samples = None
+
+
+class _Stage:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, *exception):
+        record(self.name, perf_counter() - self.start)
+        return False
+
+
+class _DisabledStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exception):
+        return False
+
+
+_DISABLED = _DisabledStage()
+
+
+def enable() -> None:
+    """Starts recording the stages, the samples recorded so far are kept."""
+    global _samples
+    if _samples is None:
+        _samples = {}
+
+
+def disable() -> None:
+    """Stops recording the stages and drops the recorded samples."""
+    global _samples
+    _samples = None
+
+
+def enabled() -> bool:
+    """Returns whether the stages are recorded."""
+    return _samples is not None
+
+
+def stage(name: str):
+    """Returns context manager measuring the duration of the stage, e.g.
+       'with profiling.stage("serialise"): ...'. Nothing is measured when the
+       profiling is disabled, the shared no-op context manager is returned then.
+
+       :param name: name of the stage, e.g. 'settings:dieharder'
+    """
+    if _samples is None:
+        return _DISABLED
+    return _Stage(name)
+
+
+def record(name: str, seconds: float) -> None:
+    """Records one duration of the stage, ignored when the profiling is disabled."""
+    if _samples is not None:
+        _samples.setdefault(name, []).append(seconds)
+
+
+def collect() -> Optional[Dict[str, List[float]]]:
+    """Returns the recorded samples and starts a new recording, e.g. in worker processes.
+
+       :return: dictionary stage name -> durations in seconds, None when the profiling is disabled
+    """
+    global _samples
+    if _samples is None:
+        return None
+    samples, _samples = _samples, {}
+    return samples
+
+
+def merge(samples: Optional[Dict[str, List[float]]]) -> None:
+    """Adds the samples returned by collect (e.g. by a worker process) to the recorded ones."""
+    if _samples is None or samples is None:
+        return
+    for name, durations in samples.items():
+        _samples.setdefault(name, []).extend(durations)
+
+
+def _percentile(ordered: List[float], fraction: float) -> float:
+    return ordered[max(0, int(ceil(fraction * len(ordered))) - 1)]
+
+
+def counters() -> Dict[str, Dict[str, float]]:
+    """Returns counters of the recorded stages.
+
+       :return: dictionary stage name -> dictionary with the count of the samples, the total,
+                p50 (median), p99 and max duration in seconds, empty when the profiling is disabled
+    """
+    result = {}
+    for name, durations in (_samples or {}).items():
+        ordered = sorted(durations)
+        result[name] = {"count": len(ordered),
+                        "total": sum(ordered),
+                        "p50": _percentile(ordered, 0.5),
+                        "p99": _percentile(ordered, 0.99),
+                        "max": ordered[-1]}
+    return result
+
+
+def format_counters(stage_counters: Dict[str, Dict[str, float]], output_format: str = "text") -> str:
+    """Formats the counters of the stages as a text table ordered by the total duration, or as JSON.
+
+       :param stage_counters: the counters, see counters
+       :param output_format: 'text' or 'json'
+       :return: the formatted counters
+    """
+    if output_format == "json":
+        return json.dumps(stage_counters, indent=4, sort_keys=True)
+    header = ["stage", "count", "total [ms]", "p50 [ms]", "p99 [ms]", "max [ms]"]
+    rows = [[name, str(counter["count"])] + ["{:.3f}".format(counter[key] * 1000)
+                                            for key in ["total", "p50", "p99", "max"]]
+            for name, counter in sorted(stage_counters.items(), key=lambda item: -item[1]["total"])]
+    return accounting.format_columns(header, rows, {0})
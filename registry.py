@@ -0,0 +1,102 @@
+# SPDX-License-Identifier: MIT
+from typing import List, Tuple
+from collections import namedtuple
+import profiling
+
+# Names of the batteries in the order of the configuration file.
+BATTERIES = ["dieharder", "nist-sts", "tu01-rabbit", "tu01-smallcrush", "tu01-crush",
+             "tu01-alphabit", "tu01-blockalphabit"]
+
+# Functions of one battery, all of them take parsed command line arguments (or options)
+# as the first argument: settings(args, file_size, limits) and defaults(args) create the
+# configuration sections, steps(args) describes the tests (see utilities.Step) and
+# seconds(args, test_id, variant) estimates CPU time of one psample (repetition, stream).
+Battery = namedtuple("Battery", ["name", "settings", "defaults", "steps", "seconds"])
+
+# Batteries loaded so far, the modules with their tables are imported on the first use.
+_loaded = {}
+
+
+def _load_dieharder() -> Battery:
+    from batteries import dieharder
+    return Battery("dieharder", dieharder.dieharder, dieharder.dieharder_defaults, dieharder.steps,
+                   dieharder.get_seconds_per_psample)
+
+
+def _load_nist_sts() -> Battery:
+    from batteries import nist_sts
+
+    def seconds(args, test_id: int, variant=None) -> float:
+        return nist_sts.get_seconds_per_stream(args, test_id)
+
+    return Battery("nist-sts", nist_sts.nist_sts_test, nist_sts.nist_sts_defaults, nist_sts.steps, seconds)
+
+
+def _load_testu01(name: str) -> Battery:
+    from batteries import testu01
+    battery = {battery_name: constant for constant, battery_name in testu01.BATTERY_NAMES.items()}[name]
+    functions = {
+        testu01.RABBIT: (testu01.rabbit, testu01.rabbit_defaults, testu01.rabbit_steps),
+        testu01.ALPHABIT: (testu01.alphabit, testu01.alphabit_defaults, testu01.alphabit_steps),
+        testu01.BLOCK_ALPHABIT: (testu01.block_alphabit, testu01.block_alphabit_defaults,
+                                 testu01.block_alphabit_steps),
+    }
+
+    # Crush and SmallCrush share the functions, the battery is their argument.
+    def crush(args, file_size: int, limits=None):
+        return testu01.crush(args, battery, file_size, limits)
+
+    def crush_defaults(args):
+        return testu01.crush_defaults(args, battery)
+
+    def crush_steps(args):
+        return testu01.crush_steps(args, battery)
+
+    def seconds(args, test_id: int, variant=None) -> float:
+        return testu01.get_seconds_per_repetition(args, battery, test_id)
+
+    settings, defaults, steps = functions.get(battery, (crush, crush_defaults, crush_steps))
+    return Battery(name, settings, defaults, steps, seconds)
+
+
+def get(name: str) -> Battery:
+    """Returns functions of the battery, its module is imported on the first call.
+
+       :param name: name of the battery as used in the configuration, e.g. 'tu01-crush'
+       :return: the battery
+    """
+    if name not in _loaded:
+        if name not in BATTERIES:
+            raise ValueError("Unknown battery {}.".format(name))
+        with profiling.stage("import:" + name):
+            if name == "dieharder":
+                _loaded[name] = _load_dieharder()
+            elif name == "nist-sts":
+                _loaded[name] = _load_nist_sts()
+            else:
+                _loaded[name] = _load_testu01(name)
+    return _loaded[name]
+
+
+def selected(args) -> List[Battery]:
+    """Returns the batteries chosen by the --batteries argument in the order of the
+       configuration file, all batteries when the argument is not given.
+
+       :param args: parsed command line arguments or options
+       :return: list of the chosen batteries
+    """
+    names = args.batteries if args.batteries is not None else BATTERIES
+    return [get(name) for name in BATTERIES if name in names]
+
+
+def parse_batteries(spec: str) -> Tuple[str, ...]:
+    """Parses comma separated list of battery names, e.g. 'dieharder,tu01-crush'.
+
+       :param spec: the list as given by the --batteries argument
+       :return: tuple of the names in the order of the configuration file
+    """
+    names = {name.strip() for name in spec.split(",")}
+    unknown = names - set(BATTERIES)
+    if len(unknown) > 0:
+        raise ValueError("Unknown battery {}.".format(", ".join(sorted(unknown))))
+    return tuple(name for name in BATTERIES if name in names)
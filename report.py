@@ -0,0 +1,75 @@
+# SPDX-License-Identifier: MIT
+from typing import List
+import calculator
+import accounting
+import verify
+
+
+def _percentage(consumed: int, file_size: int) -> str:
+    return "{:.2f}".format(100 * consumed / file_size)
+
+
+def utilisation_table(usages: List[accounting.Usage]) -> str:
+    """Formats the data utilisation of the tests - consumed bytes, bytes left unused
+       at the end of the file (leftover) and the percentage of the file used.
+
+       :param usages: data consumption of the tests
+       :return: the table
+    """
+    rows = []
+    for usage in usages:
+        row = [usage.battery, str(usage.test_id), "-" if usage.variant is None else str(usage.variant),
+               str(usage.count)]
+        if usage.consumed is None:
+            rows.append(row + ["-", "-", "-"])
+        else:
+            rows.append(row + [str(usage.consumed), str(usage.headroom), _percentage(usage.consumed, usage.file_size)])
+    return accounting.format_columns(["battery", "test", "variant", "count", "consumed", "leftover", "used %"],
+                                     rows, {0})
+
+
+def battery_table(usages: List[accounting.Usage]) -> str:
+    """Formats the data utilisation rolled up per battery - total consumed and leftover
+       bytes of all tests, the average and the lowest percentage of the file used.
+
+       :param usages: data consumption of the tests
+       :return: the table
+    """
+    batteries = []
+    grouped = {}
+    for usage in usages:
+        if usage.consumed is None:
+            continue
+        if usage.battery not in grouped:
+            batteries.append(usage.battery)
+            grouped[usage.battery] = []
+        grouped[usage.battery].append(usage)
+
+    rows = []
+    for battery in batteries + ["all"]:
+        tests = usages if battery == "all" else grouped[battery]
+        tests = [usage for usage in tests if usage.consumed is not None]
+        if len(tests) == 0:
+            continue
+        file_size = tests[0].file_size
+        consumed = sum(usage.consumed for usage in tests)
+        rows.append([battery, str(len(tests)), str(consumed), str(sum(usage.headroom for usage in tests)),
+                     _percentage(consumed, file_size * len(tests)),
+                     _percentage(min(usage.consumed for usage in tests), file_size)])
+    return accounting.format_columns(["battery", "tests", "consumed", "leftover", "average used %", "lowest used %"],
+                                     rows, {0})
+
+
+def run(arguments, file_size: int) -> None:
+    """Prints the data utilisation report of the configuration for the data size,
+       the configuration itself is not written.
+
+       :param arguments: parsed command line arguments
+       :param file_size: size of the tested file in bytes
+    """
+    options = calculator.options_from_arguments(arguments)
+    configuration = calculator.compute_configuration(file_size, options)
+    usages = verify.verify_configuration(options, configuration, file_size)
+    print(utilisation_table(usages))
+    print()
+    print(battery_table(usages))
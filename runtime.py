@@ -0,0 +1,49 @@
+# SPDX-License-Identifier: MIT
+from utilities import apply_limit, Step
+import breakpoints
+import registry
+
+
+def seconds_per_unit(args, step: Step) -> float:
+    """Returns estimated CPU time (in seconds) of one psample (repetition, stream)
+       of the test described by the step.
+
+       :param args: parsed command line arguments
+       :param step: the step of the test, see breakpoints.all_steps
+       :return: estimated CPU time in seconds
+    """
+    return registry.get(step.battery).seconds(args, step.test_id, step.variant)
+
+
+def estimate(args, file_size: int, limits=None):
+    """Estimates CPU time of all tests and batteries executed by the configuration.
+
+       :param args: parsed command line arguments
+       :param file_size: size of the tested file in bytes
+       :param limits: limits of the tests for every battery (battery name -> limits),
+                      see utilities.apply_limit
+       :return: the estimate in dictionary form
+    """
+    batteries = {}
+    for step in breakpoints.all_steps(args):
+        # Rabbit defaults are not a test
+        if step.test_id is None:
+            continue
+        count = apply_limit(step.count(file_size), (limits or {}).get(step.battery), step.test_id, step.variant)
+        if count <= 0:
+            continue
+        tests = batteries.setdefault(step.battery, {})
+        tests[step.test_id] = tests.get(step.test_id, 0) + count * seconds_per_unit(args, step)
+
+    result = {"cpu-hours": 0, "batteries": {}}
+    total = 0
+    for battery, tests in batteries.items():
+        battery_total = sum(tests.values())
+        total += battery_total
+        result["batteries"][battery] = {
+            "cpu-seconds": round(battery_total, 1),
+            "tests": [{"test-id": test_id, "cpu-seconds": round(seconds, 1)}
+                      for test_id, seconds in sorted(tests.items())]
+        }
+    result["cpu-hours"] = round(total / 3600, 2)
+    return result
@@ -0,0 +1,185 @@
+# SPDX-License-Identifier: MIT
+from typing import Tuple
+from functools import lru_cache
+from urllib.parse import urlsplit, parse_qs
+from sys import stderr
+from math import isfinite
+import asyncio
+import signal
+import threading
+import os
+import breakpoints
+import calculator
+import registry
+import utilities
+
+# Query parameters of the requests, named as the command line arguments.
+QUERY_OPTIONS = {
+    "increased": "increased",
+    "dieharder-buffer": "dieharder_buffer",
+    "nist-stream-size": "nist_stream_size",
+    "tu01-buffer": "tu01_buffer",
+    "tu01-bit-nb": "tu01_bit_nb",
+    "time-budget": "time_budget",
+    "batteries": "batteries",
+}
+
+# Number of option sets with the index of their configurations kept in memory.
+INDEXED_OPTIONS = 64
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed"}
+
+
+def parse_query(query: str, defaults: calculator.Options) -> Tuple[int, calculator.Options]:
+    """Parses query of the configuration request, e.g. 'size=1G&tu01-bit-nb=1000000'.
+
+       :param query: the query part of the requested URL
+       :param defaults: options used for parameters missing in the query
+       :return: tuple (data size, options)
+    """
+    parameters = {name: values[-1] for name, values in parse_qs(query).items()}
+    size = utilities.parse_size(parameters.pop("size", ""))
+    if size is None or size == 0:
+        raise ValueError("Parameter size is missing or invalid.")
+
+    changes = {}
+    for name, value in parameters.items():
+        if name not in QUERY_OPTIONS:
+            raise ValueError("Unknown parameter {}.".format(name))
+        field = QUERY_OPTIONS[name]
+        if field == "increased":
+            changes[field] = value.lower() in {"1", "true", "yes"}
+        elif field == "time_budget":
+            changes[field] = utilities.parse_duration(value)
+            if changes[field] is None:
+                raise ValueError("Parameter time-budget is invalid.")
+        elif field == "batteries":
+            changes[field] = registry.parse_batteries(value)
+        else:
+            changes[field] = type(getattr(defaults, field))(value)
+            if not isfinite(changes[field]) or changes[field] < 0 \
+                    or (isinstance(changes[field], int) and changes[field] == 0):
+                raise ValueError("Parameter {} is out of range.".format(name))
+    return size, defaults._replace(**changes)
+
+
+class ConfigServer:
+    """Serves configurations over HTTP, either on a local TCP port or on a Unix domain
+       socket. Configurations are requested by 'GET /config?size=SIZE&OPTION=VALUE...',
+       the options have the same names as the command line arguments. Recently computed
+       configurations are kept in memory, other data sizes with the same battery settings are
+       taken from the index of the options (see breakpoints.ConfigIndex)."""
+
+    def __init__(self, defaults: calculator.Options, cache_entries: int):
+        self.defaults = defaults
+        self.cache_entries = cache_entries
+        self.configuration = lru_cache(maxsize=cache_entries)(self._configuration)
+        self.index = lru_cache(maxsize=INDEXED_OPTIONS)(self._index)
+        # The indexes are filled lazily and are not safe to be filled from several threads at once.
+        self.lock = threading.Lock()
+
+    def compute(self, file_size: int, options: calculator.Options) -> bytes:
+        """Returns the serialised configuration, the caches are shared by the executor threads."""
+        with self.lock:
+            return self.configuration(file_size, options)
+
+    def _index(self, options: calculator.Options) -> breakpoints.ConfigIndex:
+        return breakpoints.ConfigIndex(options, self.cache_entries)
+
+    def _configuration(self, file_size: int, options: calculator.Options) -> bytes:
+        return calculator.serialise(self.index(options).lookup(file_size)).encode()
+
+    async def respond(self, method: str, target: str) -> Tuple[int, bytes]:
+        """Returns status and body of the response to the request. The configuration is
+           computed in the default executor, so other connections are served meanwhile."""
+        url = urlsplit(target)
+        if url.path != "/config":
+            return 404, b"Unknown path.\n"
+        if method != "GET":
+            return 405, b"Only GET requests are supported.\n"
+        try:
+            size, options = parse_query(url.query, self.defaults)
+        except ValueError as error:
+            return 400, "{}\n".format(error).encode()
+        try:
+            loop = asyncio.get_event_loop()
+            return 200, await loop.run_in_executor(None, self.compute, size, options)
+        except (ArithmeticError, ValueError):
+            return 400, b"The configuration cannot be computed for the given options.\n"
+
+    async def handle(self, reader, writer) -> None:
+        """Handles one client connection, several requests may be sent over it."""
+        try:
+            while True:
+                try:
+                    request_line = await reader.readline()
+                    if not request_line:
+                        break
+                    keep_alive = request_line.rstrip().endswith(b"HTTP/1.1")
+                    # Headers are not needed, only the connection header is checked.
+                    while True:
+                        header = await reader.readline()
+                        if header in {b"\r\n", b"\n", b""}:
+                            break
+                        name, _, value = header.decode("latin-1").partition(":")
+                        if name.strip().lower() == "connection":
+                            keep_alive = value.strip().lower() == "keep-alive"
+                except ValueError:
+                    # The line is longer than the limit of the stream, the request is malformed.
+                    request_line = b""
+
+                parts = request_line.decode("latin-1").split()
+                if len(parts) != 3:
+                    status, body = 400, b"Malformed request.\n"
+                    keep_alive = False
+                else:
+                    status, body = await self.respond(parts[0], parts[1])
+
+                content_type = "application/json" if status == 200 else "text/plain"
+                writer.write("HTTP/1.1 {} {}\r\nContent-Type: {}\r\nContent-Length: {}\r\nConnection: {}\r\n\r\n"
+                             .format(status, REASONS[status], content_type, len(body),
+                                     "keep-alive" if keep_alive else "close").encode() + body)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+
+def run(arguments) -> None:
+    """Runs the configuration service until it is interrupted. The address given by
+       the --serve argument is either 'unix:PATH' or 'HOST:PORT'.
+
+       :param arguments: parsed command line arguments
+    """
+    server = ConfigServer(calculator.options_from_arguments(arguments), arguments.memory_cache)
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+
+    address = arguments.serve
+    if address.startswith("unix:"):
+        path = address[len("unix:"):]
+        listening = loop.run_until_complete(asyncio.start_unix_server(server.handle, path=path))
+    else:
+        path = None
+        host, _, port = address.rpartition(":")
+        listening = loop.run_until_complete(asyncio.start_server(server.handle, host or "127.0.0.1", int(port)))
+    print("Serving configurations on {}".format(address), file=stderr)
+    try:
+        loop.add_signal_handler(signal.SIGTERM, loop.stop)
+    except NotImplementedError:
+        # Signal handlers are not available on Windows.
+        pass
+
+    try:
+        loop.run_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        listening.close()
+        loop.run_until_complete(listening.wait_closed())
+        loop.close()
+        if path is not None and os.path.exists(path):
+            os.remove(path)
@@ -0,0 +1,92 @@
+# SPDX-License-Identifier: MIT
+from typing import Dict, List, Optional
+from collections import namedtuple
+from heapq import heapify, heappop, heappush
+from utilities import apply_limit
+import os
+import breakpoints
+import budget
+import runtime
+
+WARN_SHARD = "WARNING - This configuration is one shard of the tests, tests executed by other shards \
+are listed as omitted."
+
+# One part of the tests, index is numbered from 1. Limits omit all tests executed by other shards.
+Shard = namedtuple("Shard", ["index", "count", "limits"])
+
+
+def merge_limits(first: Optional[Dict[str, dict]], second: Optional[Dict[str, dict]]) -> Dict[str, dict]:
+    """Merges limits of psamples (repetitions) for every battery, the lower limit is used.
+
+       :param first: limits of the tests for every battery (battery name -> limits), may be None
+       :param second: limits of the tests for every battery, may be None
+       :return: the merged limits
+    """
+    result = {}
+    for limits in [first or {}, second or {}]:
+        for battery, battery_limits in limits.items():
+            merged = result.setdefault(battery, {})
+            for test, limit in battery_limits.items():
+                merged[test] = min(limit, merged.get(test, limit))
+    return result
+
+
+def create_shards(args, file_size: int, count: int) -> List[Shard]:
+    """Splits tests of all batteries into shards with balanced estimated CPU time.
+       The most expensive tests are assigned first, each one to the shard with
+       the lowest CPU time so far (longest processing time first). Variants of
+       Dieharder tests are assigned separately, variants of other tests together.
+
+       :param args: parsed command line arguments
+       :param file_size: size of the tested file in bytes
+       :param count: number of shards
+       :return: list of the shards
+    """
+    limits = None
+    if args.time_budget is not None:
+        limits = budget.budget_limits(args, file_size, args.time_budget)
+
+    # (battery, test_id, variant) -> [CPU time, steps]
+    groups = {}
+    for step in breakpoints.all_steps(args):
+        # Rabbit defaults are not a test
+        if step.test_id is None:
+            continue
+        test_count = apply_limit(step.count(file_size), (limits or {}).get(step.battery),
+                                 step.test_id, step.variant)
+        if test_count <= 0:
+            continue
+        key = (step.battery, step.test_id, step.variant if step.battery == "dieharder" else None)
+        group = groups.setdefault(key, [0, []])
+        group[0] += test_count * runtime.seconds_per_unit(args, step)
+        group[1].append(step)
+
+    assigned = [[] for _ in range(count)]
+    loads = [(0, index) for index in range(count)]
+    heapify(loads)
+    for key, (seconds, steps) in sorted(groups.items(), key=lambda item: (-item[1][0], item[0])):
+        load, index = heappop(loads)
+        assigned[index].extend(steps)
+        heappush(loads, (load + seconds, index))
+
+    shards = []
+    for index in range(count):
+        shard_limits = {}
+        for other in range(count):
+            if other == index:
+                continue
+            for step in assigned[other]:
+                shard_limits.setdefault(step.battery, {})[(step.test_id, step.variant)] = 0
+        shards.append(Shard(index + 1, count, shard_limits))
+    return shards
+
+
+def shard_path(path: str, index: int) -> str:
+    """Returns path of the configuration file of one shard, e.g. 'config-1.json' for 'config.json'.
+
+       :param path: path to the configuration file
+       :param index: index of the shard (numbered from 1)
+       :return: path to the configuration file of the shard
+    """
+    root, extension = os.path.splitext(path)
+    return "{}-{}{}".format(root, index, extension)
@@ -0,0 +1,59 @@
+# SPDX-License-Identifier: MIT
+from typing import List
+from collections import namedtuple
+import breakpoints
+import registry
+
+# Required count of psamples (repetitions), test_id and variant may be None.
+Target = namedtuple("Target", ["battery", "test_id", "variant", "count"])
+
+
+def parse_targets(spec: str) -> List[Target]:
+    """Parses the target coverage. The coverage is a comma separated list of items
+       BATTERY[:TEST-ID[:VARIANT]]=COUNT, e.g. 'tu01-crush=2,dieharder:200=1'. The
+       variant is ntup for Dieharder and bit_w for BlockAlphabit. When the test (variant)
+       is not given, the count is required for all tests (variants) of the battery.
+
+       :param spec: the target coverage as given by the --target argument
+       :return: list of parsed targets
+    """
+    targets = []
+    for item in spec.split(","):
+        name, separator, count = item.strip().partition("=")
+        parts = name.split(":")
+        if separator == "" or not count.isnumeric() or len(parts) > 3 or parts[0] not in registry.BATTERIES:
+            raise ValueError("Invalid target '{}'.".format(item))
+        try:
+            ids = [int(part) for part in parts[1:]]
+        except ValueError:
+            raise ValueError("Invalid target '{}'.".format(item))
+        ids += [None] * (2 - len(ids))
+        targets.append(Target(parts[0], ids[0], ids[1], int(count)))
+    return targets
+
+
+def smallest_size(args, targets: List[Target]) -> int:
+    """Returns the smallest data size which satisfies all targets. The number of psamples
+       (repetitions) of every test never decreases with the data size, so the result is
+       the maximum of the smallest sizes satisfying the single tests.
+
+       :param args: parsed command line arguments
+       :param targets: the required coverage, see parse_targets
+       :return: the smallest data size in bytes
+    """
+    steps = breakpoints.all_steps(args)
+    size = 1
+    for target in targets:
+        matching = [step for step in steps if step.battery == target.battery
+                    and (target.test_id is None or step.test_id == target.test_id)
+                    and (target.variant is None or step.variant == target.variant)]
+        # Rabbit has also step for the default repetitions, only tests are targeted.
+        if target.test_id is None and any(step.test_id is not None for step in matching):
+            matching = [step for step in matching if step.test_id is not None]
+        if len(matching) == 0:
+            raise ValueError("Target {} does not match any test executed with the given options."
+                             .format(target.battery if target.test_id is None else
+                                     ":".join(str(part) for part in target[:3] if part is not None)))
+        for step in matching:
+            size = max(size, step.first_size(target.count))
+    return size
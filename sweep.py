@@ -0,0 +1,96 @@
+# SPDX-License-Identifier: MIT
+from typing import List
+import breakpoints
+from utilities import Step
+
+# NumPy is optional, it is needed only by the vectorised engine.
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def counts_python(steps: List[Step], sizes: List[int]) -> List[List[int]]:
+    """Computes psamples (repetitions) of the tests for every data size by the scalar
+       path, see utilities.Step.count. Tests with count lower than 1 are omitted from
+       the configuration.
+
+       :param steps: steps of the tests, see breakpoints.all_steps
+       :param sizes: data sizes in bytes
+       :return: matrix of counts, one row per step and one column per size
+    """
+    return [[step.count(size) for size in sizes] for step in steps]
+
+
+def counts_numpy(steps: List[Step], sizes):
+    """Computes psamples (repetitions) of the tests for every data size with integer
+       array division, the result is equal to counts_python. The byte tables of the
+       batteries are turned into columns of the steps. The sizes whose multiplication
+       by the scale would overflow int64 (around 1 EiB) are computed by the scalar path.
+
+       :param steps: steps of the tests, see breakpoints.all_steps
+       :param sizes: data sizes in bytes, a sequence or an array of integers
+       :return: int64 array of counts with shape (number of steps, number of sizes)
+    """
+    if numpy is None:
+        raise ImportError("The vectorised engine requires NumPy.")
+    sizes = numpy.asarray(sizes, dtype=numpy.int64)
+    largest = numpy.iinfo(numpy.int64).max // max([step.scale for step in steps] + [1])
+    fits = sizes <= largest
+    if fits.all():
+        return _counts_vectorised(steps, sizes)
+    counts = numpy.empty((len(steps), len(sizes)), dtype=numpy.int64)
+    counts[:, fits] = _counts_vectorised(steps, sizes[fits])
+    counts[:, ~fits] = numpy.array(counts_python(steps, sizes[~fits].tolist()), dtype=numpy.int64)
+    return counts
+
+
+def _counts_vectorised(steps: List[Step], sizes):
+    sizes = sizes[numpy.newaxis, :]
+
+    def column(field: str):
+        return numpy.array([getattr(step, field) for step in steps], dtype=numpy.int64)[:, numpy.newaxis]
+
+    # In-place operations avoid temporary matrices, the matrix may have billions of cells.
+    counts = sizes * column("scale")
+    counts -= column("offset")
+    counts //= column("unit")
+    counts += column("extra")
+    counts[sizes < column("minimum")] = 0
+    return counts
+
+
+def sweep(args, sizes, engine: str = None):
+    """Computes the whole test x size matrix of psamples (repetitions) for the data sizes.
+       Tests omitted for all data sizes (e.g. with too small bit_nb) have no rows. The
+       Rabbit row with test_id None holds the default repetitions. Time budget is not
+       taken into account.
+
+       :param args: parsed command line arguments or calculator.Options
+       :param sizes: data sizes in bytes
+       :param engine: 'numpy', 'python' or None for NumPy when it is available
+       :return: tuple (steps, counts) - the steps describe the rows (see Step.name),
+                counts is NumPy array for the numpy engine and list of lists otherwise
+    """
+    steps = breakpoints.all_steps(args)
+    if engine is None:
+        engine = "python" if numpy is None else "numpy"
+    if engine == "numpy":
+        return steps, counts_numpy(steps, sizes)
+    if engine == "python":
+        return steps, counts_python(steps, list(sizes))
+    raise ValueError("Unknown engine {}.".format(engine))
+
+
+def as_columns(steps: List[Step], counts, sizes):
+    """Converts the result of sweep into columns, e.g. for pandas.DataFrame.
+
+       :param steps: rows of the matrix, as returned by sweep
+       :param counts: the matrix, as returned by sweep
+       :param sizes: data sizes of the columns of the matrix
+       :return: dictionary column name -> list of values, the first column is 'data-size'
+    """
+    columns = {"data-size": list(sizes)}
+    for step, row in zip(steps, counts):
+        columns[step.name] = list(row)
+    return columns
@@ -0,0 +1,81 @@
+# SPDX-License-Identifier: MIT
+from typing import Optional
+from copy import copy
+
+
+def unused_bytes(file_size: int, block_bits: int) -> int:
+    """Returns number of bytes left unused when the data is read in blocks of the given size.
+
+       :param file_size: size of the tested file in bytes
+       :param block_bits: size of one block (bit_nb or stream size) in bits
+       :return: number of unused bytes at the end of the file
+    """
+    return file_size - ((file_size * 8) // block_bits) * block_bits // 8
+
+
+def tune_block_size(file_size: int, min_bits: int, alignment: int) -> Optional[int]:
+    """Returns block size (in bits) not lower than min_bits, which leaves the least
+       unused data while keeping the highest possible number of blocks. The number
+       of blocks is fixed by the lowest block size, the block is then enlarged to
+       spread the remaining data over all blocks.
+
+       :param file_size: size of the tested file in bytes
+       :param min_bits: the lowest allowed block size in bits
+       :param alignment: the block size in bytes is a multiple of alignment
+       :return: the block size in bits, None if the data is smaller than one block
+    """
+    min_bytes = -(-min_bits // (8 * alignment)) * alignment
+    blocks = file_size // min_bytes
+    if blocks == 0:
+        return None
+    return (file_size // blocks) // alignment * alignment * 8
+
+
+def tune_bit_nb(file_size: int, min_bit_nb: Optional[int] = None) -> Optional[int]:
+    """Returns bit_nb argument for TestU01 Rabbit, Alphabit and BlockAlphabit batteries
+       which leaves the least unused data. The bit_nb is aligned to 32-bit words read
+       by the batteries.
+
+       :param file_size: size of the tested file in bytes
+       :param min_bit_nb: the lowest allowed bit_nb, by default the lowest value
+                          for which no Rabbit test is omitted
+       :return: the bit_nb, None if the data is too small
+    """
+    if min_bit_nb is None:
+        # Imported here, the battery tables are loaded only when they are needed.
+        from batteries import testu01
+        min_bit_nb = max(test.min_bit_nb for test in testu01.TESTS[testu01.RABBIT].values())
+    return tune_block_size(file_size, max(min_bit_nb, 500), 4)
+
+
+def tune_stream_size(file_size: int) -> Optional[int]:
+    """Returns stream size argument for NIST STS battery which leaves the least unused
+       data and follows the NIST recommendations.
+
+       :param file_size: size of the tested file in bytes
+       :return: the stream size, None if the data is too small for the battery
+    """
+    from batteries import nist_sts
+    stream_size = tune_block_size(file_size, nist_sts.MIN_STREAM_SIZE, 1)
+    # The battery is not executed for data smaller than the stream size.
+    if stream_size is None or file_size < stream_size:
+        return None
+    return stream_size
+
+
+def tuned_arguments(arguments, file_size: int):
+    """Returns copy of the arguments with bit_nb and NIST stream size tuned
+       for the data size. Arguments which cannot be tuned are kept.
+
+       :param arguments: parsed command line arguments
+       :param file_size: size of the tested file in bytes
+       :return: the tuned arguments
+    """
+    tuned = copy(arguments)
+    bit_nb = tune_bit_nb(file_size, arguments.tune_min_bit_nb)
+    if bit_nb is not None:
+        tuned.tu01_bit_nb = bit_nb
+    stream_size = tune_stream_size(file_size)
+    if stream_size is not None:
+        tuned.nist_stream_size = stream_size
+    return tuned
@@ -1,5 +1,7 @@
 # SPDX-License-Identifier: MIT
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
+from collections import namedtuple
+from functools import lru_cache
 from re import compile
 
 KILO = 1024
@@ -33,6 +35,53 @@ def parse_size(size: str) -> Optional[int]:
     return int(size[:-1]) * power
 
 
+def format_size(size: int) -> str:
+    """Converses size in bytes to short human readable string,
+       for example 3250585 -> '3.1M'."""
+    for unit, power in (("T", TERA), ("G", GIGA), ("M", MEGA), ("K", KILO)):
+        if size >= power:
+            return "{:.1f}{}".format(size / power, unit)
+    return str(size)
+
+
+def parse_duration(duration: str) -> Optional[float]:
+    """Converses duration from string to seconds. Duration must be all numeric,
+       only the last character may denote unit (seconds, minutes, hours or days)."""
+    regex = compile("^[0-9]+(\\.[0-9]+)?[sSmMhHdD]?$")
+    if regex.fullmatch(duration) is None:
+        return None
+
+    units = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+    if duration[-1].lower() in units:
+        return float(duration[:-1]) * units[duration[-1].lower()]
+    return float(duration)
+
+
+def apply_limit(count: int, limits: Optional[Dict[Tuple[int, Optional[int]], int]],
+                test_id: int, variant: Optional[int] = None) -> int:
+    """Lowers the number of psamples (repetitions) of the test to its limit.
+    The limits map tuples (test_id, variant) to the highest allowed number,
+    the variant is None for tests with no variants. Zero limit omits the test.
+    Tests with no limit (or no limits at all) are not changed."""
+    if limits is None or (test_id, variant) not in limits:
+        return count
+    return min(count, limits[(test_id, variant)])
+
+
+def get_buffer(args, battery: str, test_id: int, default: float) -> float:
+    """Returns buffer of the variable size test. Calibrated buffers (see calibration.py)
+    are given by args.buffers as tuple of (battery, test_id, buffer), the default
+    buffer is used for tests without calibrated buffer."""
+    if args.buffers is None:
+        return default
+    return _buffer_table(args.buffers).get((battery, test_id), default)
+
+
+@lru_cache(maxsize=16)
+def _buffer_table(buffers: Tuple[Tuple[str, int, float], ...]) -> Dict[Tuple[str, int], float]:
+    return {(battery, test_id): buffer for battery, test_id, buffer in buffers}
+
+
 def concatenate_test_ids(test_ids: List[int]) -> List[str]:
     """Shortens the list of test IDs (integers) into more compact
     format. For example [1, 2, 3, 5, 6] -> ["1-3", "5-6"]."""
@@ -55,3 +104,68 @@ def concatenate_test_ids(test_ids: List[int]) -> List[str]:
     else:
         concat.append("{}-{}".format(first, last))
     return concat
+
+
+class Step(namedtuple("Step", ["battery", "test_id", "variant", "unit", "scale", "offset", "extra", "minimum"])):
+    """Describes how the number of psamples (repetitions) of one test depends on the
+       data size. The number is computed as (file_size * scale - offset) // unit + extra,
+       therefore it changes only at multiples of the unit. Data sizes lower than minimum
+       have zero psamples (repetitions), minimum is 0 by default. Battery is the name of the
+       battery as used in the configuration ("dieharder", "tu01-crush"...), test_id and
+       variant may be None for settings shared by the whole battery."""
+    __slots__ = ()
+
+    @property
+    def name(self) -> str:
+        """Returns name of the test in the format of the --target argument, e.g. 'dieharder:200:3'."""
+        return ":".join(str(part) for part in [self.battery, self.test_id, self.variant] if part is not None)
+
+    def count(self, file_size: int) -> int:
+        """Returns number of psamples (repetitions) for the given data size."""
+        if file_size < self.minimum:
+            return 0
+        return (file_size * self.scale - self.offset) // self.unit + self.extra
+
+    def first_size(self, count: int) -> int:
+        """Returns the smallest data size with at least count psamples (repetitions)."""
+        needed = (count - self.extra) * self.unit + self.offset
+        size = max(0, -(-needed // self.scale))
+        return size if count <= 0 else max(size, self.minimum)
+
+    def consumed(self, count: int) -> int:
+        """Returns number of bytes read by the given number of psamples (repetitions)."""
+        if count <= 0:
+            return 0
+        return -(-(count * self.unit + self.offset) // self.scale)
+
+
+Step.__new__.__defaults__ = (0,)
+
+
+class TestDescriptor(namedtuple("TestDescriptor", ["test_id", "name", "unit", "variable", "omitted", "variants",
+                                                   "min_bit_nb", "params", "seconds", "repetitions", "offset",
+                                                   "fluctuating"])):
+    """Immutable description of one test of a battery, the batteries build a table of
+       them once at import. Unit is the number of bytes read by one psample (repetition)
+       with the default arguments, None if it depends on them. Variable tests read
+       a variable amount of data and their unit is increased by the buffer, omitted
+       tests are not executed by default. Variants are the identifiers of the test
+       variants (ntup, bit_w), min_bit_nb, params, seconds (estimated CPU time of one
+       repetition) and repetitions (default number used by the battery) are None when
+       not applicable. Offset is the number of bytes skipped before the test reads the
+       data. Fluctuating tests read slightly varying amount of data, they are reported
+       as variable, but no buffer is used."""
+    __slots__ = ()
+
+
+TestDescriptor.__new__.__defaults__ = (False, False, (), None, None, None, None, 0, False)
+
+
+def expand_test_ids(test_ids: List[str]) -> List[int]:
+    """Expands the compact format of test IDs into list of integers,
+    the inverse of concatenate_test_ids. For example ["1-3", "5"] -> [1, 2, 3, 5]."""
+    expanded = []
+    for item in test_ids:
+        first, _, last = str(item).partition("-")
+        expanded.extend(range(int(first), int(last or first) + 1))
+    return expanded
@@ -0,0 +1,166 @@
+# SPDX-License-Identifier: MIT
+from typing import List, Optional, Tuple
+from re import compile
+from sys import stderr, exit
+import json
+import calculator
+import accounting
+from utilities import Step, expand_test_ids
+
+NTUP_PATTERN = compile(r"-n\s+(\d+)")
+
+
+def _variant(variant) -> Optional[int]:
+    if "bit-w" in variant:
+        return int(variant["bit-w"])
+    match = NTUP_PATTERN.search(variant.get("arguments", ""))
+    return None if match is None else int(match.group(1))
+
+
+def test_counts(settings, key: str, default: int) -> List[Tuple[int, Optional[int], int]]:
+    """Returns psamples (repetitions, streams) of all executed tests from the battery settings.
+       Tests without specific settings use the battery defaults.
+
+       :param settings: the battery settings, e.g. the dieharder-settings section
+       :param key: name of the count, e.g. 'psamples' or 'repetitions'
+       :param default: count used when the defaults do not contain it
+       :return: list of tuples (test_id, variant, count), the variant is ntup
+                for Dieharder, bit_w for BlockAlphabit and None otherwise
+    """
+    defaults = settings.get("defaults", {})
+    default_count = int(defaults.get(key, default))
+    specific = {int(test["test-id"]): test for test in settings.get("test-specific-settings", [])}
+    result = []
+    for test_id in expand_test_ids(defaults.get("test-ids", [])):
+        test = specific.get(test_id, {})
+        test_count = int(test.get(key, default_count))
+        if "variants" in test:
+            for variant in test["variants"]:
+                result.append((test_id, _variant(variant), int(variant.get(key, test_count))))
+        else:
+            result.append((test_id, None, test_count))
+    return result
+
+
+# The battery modules are imported by the steps, only batteries present in the configuration are loaded.
+def _dieharder_step(options, settings, test_id: int, variant: Optional[int]) -> Optional[Step]:
+    from batteries import dieharder
+    try:
+        unit = dieharder.get_bytes_per_psample(options, test_id, variant)
+    except (ValueError, TypeError):
+        return None
+    return Step("dieharder", test_id, variant, unit, 1, dieharder.TESTS[test_id].offset, 0)
+
+
+def _nist_sts_step(options, settings, test_id: int, variant: Optional[int]) -> Optional[Step]:
+    stream_size = int(settings.get("defaults", {}).get("stream-size", options.nist_stream_size))
+    return Step("nist-sts", test_id, None, stream_size, 8, 0, 0)
+
+
+def _crush_step(name: str):
+    def step(options, settings, test_id: int, variant: Optional[int]) -> Optional[Step]:
+        from batteries import testu01
+        battery = testu01.CRUSH if name == "tu01-crush" else testu01.SMALL_CRUSH
+        try:
+            unit = testu01.crush_get_bytes_per_repetition(options, battery, test_id)
+        except ValueError:
+            return None
+        return Step(name, test_id, None, unit, 1, 0, 0)
+    return step
+
+
+def _bit_nb(options, settings) -> int:
+    return int(settings.get("defaults", {}).get("bit-nb", options.tu01_bit_nb))
+
+
+def _rabbit_step(options, settings, test_id: int, variant: Optional[int]) -> Optional[Step]:
+    from batteries import testu01
+    options = options._replace(tu01_bit_nb=_bit_nb(options, settings))
+    try:
+        if options.tu01_bit_nb == testu01.BIT_NB_DEFAULT:
+            unit = testu01.rabbit_default_bytes_per_repetitions(options, test_id)
+        else:
+            unit = testu01.rabbit_bytes_per_repetition(options, test_id)
+    except KeyError:
+        return None
+    if unit is None:
+        return None
+    return Step("tu01-rabbit", test_id, None, unit, 1, 0, 0)
+
+
+def _alphabit_step(battery: str):
+    def step(options, settings, test_id: int, variant: Optional[int]) -> Optional[Step]:
+        return Step(battery, test_id, variant, _bit_nb(options, settings), 8, 0, 0)
+    return step
+
+
+# Settings of the batteries - (battery name, name of the count, default count, step of the test).
+# RTT runs 100 psamples of Dieharder tests by default.
+BATTERIES = [
+    ("dieharder", "psamples", 100, _dieharder_step),
+    ("nist-sts", "stream-count", 0, _nist_sts_step),
+    ("tu01-rabbit", "repetitions", 1, _rabbit_step),
+    ("tu01-smallcrush", "repetitions", 1, _crush_step("tu01-smallcrush")),
+    ("tu01-crush", "repetitions", 1, _crush_step("tu01-crush")),
+    ("tu01-alphabit", "repetitions", 1, _alphabit_step("tu01-alphabit")),
+    ("tu01-blockalphabit", "repetitions", 1, _alphabit_step("tu01-blockalphabit")),
+]
+
+
+def verify_configuration(options, configuration, file_size: int) -> List[accounting.Usage]:
+    """Replays the data consumption of every test (variant) executed by the configuration.
+       Every test reads the data from the beginning of the file, so it is compared with
+       the whole file. The variable size tests are accounted with the buffers given by
+       the options, bit_nb and stream size are taken from the configuration.
+
+       :param options: options (parsed command line arguments) with the buffers
+       :param configuration: the whole configuration or its randomness-testing-toolkit section
+       :param file_size: size of the tested file in bytes
+       :return: data consumption of the executed tests
+    """
+    configuration = configuration.get("randomness-testing-toolkit", configuration)
+    usages = []
+    for battery, key, default, step_of in BATTERIES:
+        settings = configuration.get(battery + "-settings")
+        if settings is None:
+            continue
+        for test_id, variant, count in test_counts(settings, key, default):
+            if count <= 0:
+                continue
+            step = step_of(options, settings, test_id, variant)
+            if step is None:
+                usages.append(accounting.Usage(battery, test_id, variant, count, None, None, file_size))
+            else:
+                usages.append(accounting.Usage(battery, test_id, variant, count, -(-step.unit // step.scale),
+                                    step.consumed(count), file_size))
+    return usages
+
+
+def run(arguments, file_size: int) -> None:
+    """Verifies the configuration given by the --verify argument against the data size.
+       Prints the data consumption of every test and exits with nonzero status when
+       some test rewinds the file or its consumption cannot be predicted.
+
+       :param arguments: parsed command line arguments
+       :param file_size: size of the tested file in bytes
+    """
+    try:
+        with open(arguments.verify) as config_file:
+            configuration = json.load(config_file)
+    except (OSError, ValueError) as error:
+        print("The configuration cannot be read: {}".format(error), file=stderr)
+        exit(-1)
+
+    try:
+        usages = verify_configuration(calculator.options_from_arguments(arguments), configuration, file_size)
+    except (ValueError, TypeError) as error:
+        # Malformed test IDs, variants or counts of the configuration.
+        print("The configuration cannot be verified: {}".format(error), file=stderr)
+        exit(-1)
+    print(accounting.format_table(usages))
+    rewound = sum(1 for usage in usages if usage.status == "rewind")
+    unknown = sum(1 for usage in usages if usage.status == "unknown")
+    print("{} tests verified, {} rewind the data, {} with unpredictable consumption."
+          .format(len(usages), rewound, unknown))
+    if rewound > 0 or unknown > 0:
+        exit(-1)
@@ -0,0 +1,108 @@
+# SPDX-License-Identifier: MIT
+from typing import List, Optional
+from glob import glob, has_magic
+from time import sleep
+from sys import stderr
+import os
+import breakpoints
+import calculator
+import solver
+
+
+def watched_paths(source: str) -> List[str]:
+    """Returns the watched data files. The source is either a directory (all regular files
+       inside it are watched), a glob pattern or a path to a single file, which may not
+       exist yet. Directories and patterns are scanned again on every poll.
+
+       :param source: the source as given by the --watch argument
+       :return: sorted list of paths
+    """
+    if os.path.isdir(source):
+        return sorted(entry.path for entry in os.scandir(source) if entry.is_file())
+    if has_magic(source):
+        return sorted(path for path in glob(source) if os.path.isfile(path))
+    return [source]
+
+
+class Watcher:
+    """Watches growing data files and rewrites their configurations only when the data size
+       leaves the interval of sizes sharing the configuration (see breakpoints.interval).
+       With the target coverage, no configuration is written until the data is big enough."""
+
+    def __init__(self, arguments):
+        # Imported here, config_calc imports this module.
+        import config_calc
+
+        self.arguments = arguments
+        self.write_configuration = config_calc.write_configuration
+        self.steps = breakpoints.all_steps(calculator.options_from_arguments(arguments))
+        self.required = 1
+        if arguments.target is not None:
+            self.required = solver.smallest_size(arguments, solver.parse_targets(arguments.target))
+        # Path -> interval [start, end) of sizes with the written configuration
+        self.intervals = {}
+
+    def config_path(self, path: str) -> str:
+        """Returns path to the configuration of the data file."""
+        if os.path.isdir(self.arguments.watch) or has_magic(self.arguments.watch):
+            return os.path.join(self.arguments.output_dir, os.path.basename(path) + ".json")
+        return self.arguments.config_file
+
+    def check(self, path: str) -> Optional[str]:
+        """Rewrites the configuration of the data file when its size crossed a breakpoint.
+           Errors of the writing are printed to the standard error output.
+
+           :param path: path to the data file
+           :return: message describing the change, None when nothing was written
+        """
+        try:
+            size = os.stat(path).st_size
+        except OSError:
+            return None
+        if size < self.required:
+            return None
+        start, end = self.intervals.get(path, (0, 0))
+        if start <= size < end:
+            return None
+
+        config_file = self.config_path(path)
+        directory = os.path.dirname(config_file)
+        try:
+            if directory != "":
+                os.makedirs(directory, exist_ok=True)
+            self.write_configuration(self.arguments, config_file, size)
+        except OSError as error:
+            # The file is checked again on the next poll, other files are still watched.
+            print("{}: {}".format(path, error), file=stderr, flush=True)
+            return None
+        ready = path not in self.intervals and self.arguments.target is not None
+        self.intervals[path] = breakpoints.interval(self.steps, size)
+        return "{}: {} bytes, {} written{}".format(path, size, config_file, ", target reached" if ready else "")
+
+    def poll(self) -> List[str]:
+        """Checks all watched files once.
+
+           :return: messages describing the written configurations
+        """
+        messages = []
+        for path in watched_paths(self.arguments.watch):
+            message = self.check(path)
+            if message is not None:
+                messages.append(message)
+        return messages
+
+
+def run(arguments) -> None:
+    """Runs the watch mode until it is interrupted - polls the files given by the --watch
+       argument every --watch-interval seconds.
+
+       :param arguments: parsed command line arguments
+    """
+    watcher = Watcher(arguments)
+    try:
+        while True:
+            for message in watcher.poll():
+                print(message, flush=True)
+            sleep(arguments.watch_interval)
+    except KeyboardInterrupt:
+        pass